@@ -0,0 +1,46 @@
+"""
+File: _parallel.py
+Author: Alex Klapheke
+Email: alexklapheke@gmail.com
+Github: https://github.com/alexklapheke
+Description: Shared handling of n_jobs= options
+
+Copyright © 2020 Alex Klapheke
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+
+
+def _n_workers(n_jobs):
+    """The number of workers an `n_jobs=` option asks for: None means 1,
+    and negative numbers count back from the number of processors, so -1
+    uses all of them and -2 all but one."""
+    if n_jobs is None:
+        return 1
+    elif n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    elif n_jobs == 0:
+        raise ValueError("n_jobs must be None, a positive number of "
+                         "workers, or negative to count back from the "
+                         "number of processors")
+    else:
+        return n_jobs
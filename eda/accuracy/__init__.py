@@ -3,4 +3,9 @@ from .accuracy import multiaccuracy
 from .accuracy import multiaccuracy_heatmap
 from .accuracy import fuzzy_accuracy
 from .accuracy import cohens_kappa
+from .accuracy import kappa_matrix
+from .accuracy import AccuracyAccumulator
+from .accuracy import MultiaccuracyAccumulator
+from .accuracy import FuzzyAccuracyAccumulator
+from .accuracy import KappaAccumulator
 from .accuracy import test_LINE
@@ -32,7 +32,123 @@ import matplotlib.pyplot as plt
 from pandas import DataFrame
 
 
-def accuracy_metrics(y_true, y_pred, f_score=False):
+def _confusion(y_true, y_pred):
+    """Count the true negatives, false positives, false negatives and true
+    positives of binary predictions, in that order, in one pass."""
+    y_true = np.asarray(y_true, dtype=bool)
+    y_pred = np.asarray(y_pred, dtype=bool)
+    return np.bincount(2 * y_true.view(np.uint8) + y_pred.view(np.uint8),
+                       minlength=4)
+
+
+def _scored(y_true, y_score):
+    """Cast labels and scores to arrays, leaving out cases without a score,
+    as they can't be predicted either way."""
+    y_true = np.asarray(y_true, dtype=bool)
+    y_score = np.asarray(y_score, dtype=float)
+
+    scored = ~np.isnan(y_score)
+    if not scored.all():
+        y_true = y_true[scored]
+        y_score = y_score[scored]
+
+    return y_true, y_score
+
+
+def _sorted_thresholds(thresholds):
+    """The distinct thresholds, from highest to lowest."""
+    if isinstance(thresholds, str):
+        raise ValueError('Thresholds must be "all" or a list of numbers')
+    return np.unique(np.asarray(thresholds, dtype=float))[::-1]
+
+
+def _threshold_bins(y_true, y_score, thresholds):
+    """Count the cases, and the positive cases, scored below each of the
+    (sorted) `thresholds` but not the one before it, with a last count for
+    the cases below all of them. This needs no sort of the scores."""
+    y_true, y_score = _scored(y_true, y_score)
+    bins = np.searchsorted(-thresholds, -y_score, side="left")
+    return np.bincount(bins, minlength=len(thresholds) + 1), \
+        np.bincount(bins[y_true], minlength=len(thresholds) + 1)
+
+
+def _threshold_counts(y_true, y_score, thresholds="all"):
+    """Count the true and false positives of predicting positive wherever
+    `y_score` is at least each threshold, from the highest threshold to the
+    lowest. Return the thresholds, the counts, and the numbers of positive
+    and negative cases."""
+    if not (isinstance(thresholds, str) and thresholds == "all"):
+        thresholds = _sorted_thresholds(thresholds)
+        return (thresholds,
+                *_swept_counts(*_threshold_bins(y_true, y_score, thresholds)))
+
+    y_true, y_score = _scored(y_true, y_score)
+    positives = np.count_nonzero(y_true)
+    negatives = len(y_true) - positives
+
+    # Sort once by score, highest first, so that the positives predicted at
+    # each threshold are a running total. Of tied scores, only the last is
+    # a threshold, as all of them are predicted positive.
+    order = np.argsort(y_score, kind="stable")[::-1]
+    y_score = y_score[order]
+    tp = np.cumsum(y_true[order])
+    last = np.flatnonzero(np.append(y_score[1:] != y_score[:-1], True))
+    return y_score[last], tp[last], last + 1 - tp[last], positives, negatives
+
+
+def _swept_counts(cases, positives):
+    """Turn the counts of `_threshold_bins` into the true and false
+    positives at each threshold, and the numbers of positive and negative
+    cases."""
+    tp = np.cumsum(positives)[:-1]
+    fp = np.cumsum(cases)[:-1] - tp
+    return tp, fp, positives.sum(), cases.sum() - positives.sum()
+
+
+def _swept_table(thresholds, tp, fp, pos, neg):
+    """Tabulate the counts and metrics at each threshold."""
+    fn = pos - tp
+    tn = neg - fp
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics = DataFrame({
+            "TP": tp,
+            "FP": fp,
+            "FN": fn,
+            "TN": tn,
+            "Sensitivity": tp / pos,
+            "Specificity": tn / neg,
+            "FPR": fp / neg,
+            "PPV": tp / (tp + fp),
+            "NPV": tn / (tn + fn),
+            "Accuracy": (tp + tn) / (pos + neg),
+        }, index=thresholds)
+
+    metrics.index.name = "Threshold"
+    return metrics
+
+
+def _confusion_table(tn, fp, fn, tp):
+    """Tabulate a confusion matrix with its metrics."""
+
+    # Calculate accuracy measures
+    sens = tp / (tp + fn)
+    spec = tn / (tn + fp)
+    ppv = tp / (tp + fp)
+    npv = tn / (tn + fn)
+    acc = (tp + tn) / (tp + fp + tn + fn)
+    # f = 2 * ppv * sens / (ppv + sens)
+
+    # Compile into data frame
+    return DataFrame([
+            [tp, fp, ppv],
+            [fn, tn, npv],
+            [sens, spec, acc]],
+            columns=["Cond P", "Cond N", "PPV/NPV"],
+            index=["Test P", "Test N", "Sens/Spec"])
+
+
+def accuracy_metrics(y_true, y_pred, f_score=False, thresholds=None):
     """
     Takes a list of true outputs and model-predicted outputs, and
     returns a confusion matrix with classification metrics which is
@@ -45,68 +161,191 @@ def accuracy_metrics(y_true, y_pred, f_score=False):
 
     Intuitively, each metric is derived solely from the row or column to
     which it is adjacent, and accuracy is derived from the whole table.
+
+    If `thresholds` is given, `y_pred` is instead a list of scores, such as
+    predicted probabilities, and a case is predicted positive when its score
+    is at least the threshold. The counts and metrics are then returned for
+    each threshold, from highest to lowest, one per row, for plotting ROC
+    or precision-recall curves. Pass `thresholds="all"` to use every
+    distinct score, or a list of thresholds. For example:
+
+        metrics = accuracy_metrics(y, model.predict_proba(X)[:, 1],
+                                   thresholds=np.linspace(0, 1, 101))
+        metrics.plot(x="FPR", y="Sensitivity")
+
+    Cases with a missing score are left out. To compute these a chunk of
+    the data at a time, see `AccuracyAccumulator`.
     """
     assert len(y_true) == len(y_pred), "Arrays must be the same length."
 
-    # Cast arrays to use efficiently with numpy
-    y_true = np.array(y_true)
-    y_pred = np.array(y_pred)
+    if thresholds is not None:
+        return _swept_table(*_threshold_counts(y_true, y_pred, thresholds))
 
-    # Calculate confusion matrix
-    tp = np.sum((y_true == y_pred) & y_true)
-    tn = np.sum((y_true == y_pred) & ~y_true)
-    fp = np.sum((y_true != y_pred) & ~y_true)
-    fn = np.sum((y_true != y_pred) & y_true)
+    return _confusion_table(*_confusion(y_true, y_pred))
 
-    # Calculate accuracy measures
-    sens = tp / (tp + fn)
-    spec = tn / (tn + fp)
-    ppv = tp / (tp + fp)
-    npv = tn / (tn + fn)
-    acc = (tp + tn) / (tp + fp + tn + fn)
-    # f = 2 * ppv * sens / (ppv + sens)
 
-    # Compile into data frame
-    return DataFrame([
-            [tp, fp, ppv],
-            [fn, tn, npv],
-            [sens, spec, acc]],
-            columns=["Cond P", "Cond N", "PPV/NPV"],
-            index=["Test P", "Test N", "Sens/Spec"])
+# Largest number of (true, predicted) class pairs to count in a dense
+# matrix; with more, `multiaccuracy` counts into a sparse one
+_DENSE_CELLS = 2 ** 22
+
 
+def _drop_unused(codes, labels):
+    """Renumber integer `codes` to leave out `labels` none of them use."""
+    used = np.bincount(codes, minlength=len(labels)) > 0
+    if used.all():
+        return codes, labels
+    return np.cumsum(used)[codes] - 1, labels[used]
 
-def multiaccuracy(y_true, y_pred, normalize=False, totals=True):
+
+def _class_counts(y_true, y_pred, sparse=None):
+    """Count each pair of true and predicted classes, from integer codes
+    of the sorted labels. Return the counts, as a NumPy array or a
+    scipy.sparse matrix, and the true and predicted labels. Pairs with a
+    missing label are left out."""
+    from pandas import Index, Series, factorize
+
+    assert len(y_true) == len(y_pred), "Arrays must be the same length."
+
+    # Lists and the like are read as pandas would read a column of them
+    y_true = y_true if hasattr(y_true, "dtype") else Series(y_true)
+    y_pred = y_pred if hasattr(y_pred, "dtype") else Series(y_pred)
+
+    true_codes, true_labels = factorize(y_true, sort=True)
+    pred_codes, pred_labels = factorize(y_pred, sort=True)
+    true_labels = Index(true_labels)
+    pred_labels = Index(pred_labels)
+
+    labeled = (true_codes >= 0) & (pred_codes >= 0)
+    if not labeled.all():
+        true_codes, true_labels = _drop_unused(true_codes[labeled],
+                                               true_labels)
+        pred_codes, pred_labels = _drop_unused(pred_codes[labeled],
+                                               pred_labels)
+
+    shape = (len(true_labels), len(pred_labels))
+    if sparse is None:
+        sparse = shape[0] * shape[1] > _DENSE_CELLS
+
+    if sparse:
+        from scipy.sparse import coo_matrix
+
+        counts = coo_matrix((np.ones(len(true_codes), dtype=np.int64),
+                             (true_codes, pred_codes)), shape=shape).tocsr()
+    else:
+        counts = np.bincount(true_codes * shape[1] + pred_codes,
+                             minlength=shape[0] * shape[1]).reshape(shape)
+
+    return counts, true_labels, pred_labels
+
+
+def _class_table(counts, true_labels, pred_labels, n, normalize, totals):
+    """Label the counts from `_class_counts` as a data frame, with "All"
+    margins if `totals`, and divided by `n` if `normalize`."""
+    from pandas import Index
+
+    index = Index(true_labels, name="true")
+    columns = Index(pred_labels, name="pred")
+
+    if isinstance(counts, np.ndarray):
+        # Pairs never seen are missing rather than zero, as in a pivot table
+        if (counts == 0).any():
+            results = DataFrame(np.where(counts > 0, counts, np.nan),
+                                index=index, columns=columns)
+        else:
+            results = DataFrame(counts, index=index, columns=columns)
+
+        if totals:
+            results["All"] = counts.sum(axis=1)
+            results.loc["All"] = [*counts.sum(axis=0), counts.sum()]
+
+        return results / n if normalize else results
+
+    from scipy.sparse import bmat
+
+    if totals:
+        counts = bmat([[counts, counts.sum(axis=1)],
+                       [counts.sum(axis=0), [[counts.sum()]]]],
+                      format="csr")
+        index = index.append(Index(["All"]))
+        columns = columns.append(Index(["All"]))
+        index.name = "true"
+        columns.name = "pred"
+
+    results = DataFrame.sparse.from_spmatrix(counts, index=index,
+                                             columns=columns)
+    return results / n if normalize else results
+
+
+def multiaccuracy(y_true, y_pred, normalize=False, totals=True, sparse=None):
     """Returns a pivot table showing the rates of predicted vs. true values.
-       Use `multiaccuracy_heatmap` to generate a heatmap plot."""
-    results = DataFrame({
-        "true": y_true,
-        "pred": y_pred,
-        "one": 1
-    }).pivot_table(index="true",
-                   columns="pred",
-                   values="one",
-                   aggfunc="count",
-                   margins=totals)
-    return results / len(y_true) if normalize else results
-
-
-def multiaccuracy_heatmap(y_true, y_pred, *args, **kwargs):
+       Use `multiaccuracy_heatmap` to generate a heatmap plot.
+
+       Classes are counted in a dense table unless there are too many pairs
+       of them, in which case the result is a sparse data frame, with zero
+       rather than missing for pairs never seen. Pass `sparse` as True or
+       False to choose. To count a chunk of the data at a time, see
+       `MultiaccuracyAccumulator`."""
+    counts, true_labels, pred_labels = _class_counts(y_true, y_pred, sparse)
+    return _class_table(counts, true_labels, pred_labels, len(y_true),
+                        normalize, totals)
+
+
+def _most_confused(counts, true_labels, pred_labels, top):
+    """Return the positions of the true and predicted labels among the `top`
+    labels most often mistaken for others or others for them."""
+    row_totals = np.asarray(counts.sum(axis=1)).ravel()
+    col_totals = np.asarray(counts.sum(axis=0)).ravel()
+
+    # Correct predictions, where a true label is also a predicted one
+    match = pred_labels.get_indexer(true_labels)
+    rows = np.flatnonzero(match >= 0)
+    correct = np.asarray(counts[rows, match[rows]]).ravel()
+    row_correct = np.zeros(len(true_labels))
+    col_correct = np.zeros(len(pred_labels))
+    row_correct[rows] = correct
+    col_correct[match[rows]] = correct
+
+    labels = true_labels.union(pred_labels)
+    errors = np.zeros(len(labels))
+    errors[labels.get_indexer(true_labels)] += row_totals - row_correct
+    errors[labels.get_indexer(pred_labels)] += col_totals - col_correct
+
+    chosen = labels[np.argsort(-errors, kind="stable")[:top]]
+    return np.flatnonzero(true_labels.isin(chosen)), \
+        np.flatnonzero(pred_labels.isin(chosen))
+
+
+def multiaccuracy_heatmap(y_true, y_pred, *args, top=None, **kwargs):
     """Returns a heatmap plot of the table returned by `multiaccuracy`.
     Example usage:
 
-    multiaccuracy_heatmap(y, model.predict(X), cmap="viridis");"""
+    multiaccuracy_heatmap(y, model.predict(X), cmap="viridis");
+
+    With many classes, pass `top` to show only that many of the classes
+    most often confused with others."""
     from seaborn import heatmap
 
-    return heatmap(multiaccuracy(y_true, y_pred,
-                                 normalize=True,
-                                 totals=False),
+    counts, true_labels, pred_labels = _class_counts(y_true, y_pred)
+
+    if top is not None:
+        rows, cols = _most_confused(counts, true_labels, pred_labels, top)
+        counts = counts[rows][:, cols]
+        true_labels = true_labels[rows]
+        pred_labels = pred_labels[cols]
+
+    if not isinstance(counts, np.ndarray):
+        counts = counts.toarray()
+
+    return heatmap(_class_table(counts, true_labels, pred_labels,
+                                len(y_true), normalize=True, totals=False),
                    vmin=0, vmax=1, *args, **kwargs)
 
 
 def fuzzy_accuracy(y_true, y_pred, tolerance):
     """Returns accuracy of a model trained on numeric data with a tolerance.
        For example, with a tolerance of 1, a model prediction of 9 for a true
-       value of 10 will be counted in the "fuzzy accuracy"."""
+       value of 10 will be counted in the "fuzzy accuracy". To compute it a
+       chunk of the data at a time, see `FuzzyAccuracyAccumulator`."""
 
     y_true = np.array(y_true)
     y_pred = np.array(y_pred)
@@ -114,21 +353,327 @@ def fuzzy_accuracy(y_true, y_pred, tolerance):
     return np.mean(np.abs(y_true - y_pred) <= tolerance)
 
 
-def cohens_kappa(y_pred1, y_pred2):
-    """Calculates Cohen's kappa."""
-    assert len(y_pred1) == len(y_pred2), "Arrays must be the same length."
+def _rater_codes(predictions):
+    """Encode each of a list of raters' labels as integer codes for the
+    same set of labels, -1 for missing. Return the codes, one row per
+    rater, and the labels."""
+    from pandas import Series, factorize
+
+    codes, uniques = [], []
+    for labels in predictions:
+        labels = labels if hasattr(labels, "dtype") else Series(labels)
+        rater_codes, rater_uniques = factorize(labels)
+        codes.append(rater_codes)
+        uniques.append(np.asarray(rater_uniques, dtype=object))
+
+    # Each rater's labels are factorized on their own, then their (few)
+    # distinct labels together, to map the codes to shared ones
+    shared, labels = factorize(np.concatenate(uniques))
+    offsets = np.cumsum([0] + [len(u) for u in uniques])
+    codes = np.stack([np.append(shared[start:stop], -1)[rater_codes]
+                      for rater_codes, start, stop in
+                      zip(codes, offsets, offsets[1:])])
+
+    return codes, labels
 
-    y_pred1 = np.array(y_pred1)
-    y_pred2 = np.array(y_pred2)
 
-    p_a = np.mean(y_pred1 == y_pred2)
-    p_e = np.sum([np.mean(y_pred1 == category) *
-                  np.mean(y_pred2 == category)
-                  for category in set(y_pred1) | set(y_pred2)])
+def _rater_counts(codes, k):
+    """Count, from the codes of `_rater_codes`, the subjects on which each
+    pair of raters agree, and the subjects each rater gives each label."""
+    m, n = codes.shape
+    rated = codes >= 0
 
+    agree = np.zeros((m, m), dtype=np.int64)
+    for i in range(m):
+        agree[i, i:] = np.count_nonzero((codes[i] == codes[i:]) & rated[i],
+                                        axis=1)
+    agree = np.triu(agree) + np.triu(agree, 1).T
+
+    raters = np.broadcast_to(np.arange(m)[:, np.newaxis], codes.shape)
+    labels = np.bincount((raters * k + codes)[rated],
+                         minlength=m * k).reshape(m, k)
+
+    return agree, labels
+
+
+def _kappa(p_a, p_e):
     return (p_a - p_e) / (1 - p_e)
 
 
+def cohens_kappa(y_pred1, y_pred2):
+    """Calculates Cohen's kappa. Missing predictions count as disagreeing
+    with any other. To compare many models at once, see `kappa_matrix`, and
+    to compute it a chunk of the data at a time, `KappaAccumulator`."""
+    assert len(y_pred1) == len(y_pred2), "Arrays must be the same length."
+
+    codes, labels = _rater_codes([y_pred1, y_pred2])
+    agree, labels = _rater_counts(codes, len(labels))
+    n = codes.shape[1]
+
+    return _kappa(agree[0, 1] / n, labels[0] @ labels[1] / n**2)
+
+
+def kappa_matrix(predictions):
+    """Measures the agreement of many models' predictions for the same
+    subjects, given as a data frame with a column for each model, or a
+    list of each model's predictions. Returns a data frame of Cohen's kappa
+    for each pair of models (as `cohens_kappa`), and Fleiss' kappa for all
+    of them together. Example usage:
+
+        pairwise, fleiss = kappa_matrix({name: model.predict(X)
+                                         for name, model in models.items()})
+
+    Fleiss' kappa assumes that every model rates every subject, so it leaves
+    out subjects for which any prediction is missing."""
+    if isinstance(predictions, DataFrame):
+        names = predictions.columns
+        predictions = [predictions.iloc[:, i]
+                       for i in range(predictions.shape[1])]
+    elif isinstance(predictions, dict):
+        names = list(predictions.keys())
+        predictions = list(predictions.values())
+    else:
+        names = None
+        predictions = list(predictions)
+
+    assert len(set(map(len, predictions))) <= 1, \
+        "Arrays must be the same length."
+
+    codes, labels = _rater_codes(predictions)
+    k = len(labels)
+    m, n = codes.shape
+    agree, labels = _rater_counts(codes, k)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pairwise = DataFrame(_kappa(agree / n, labels @ labels.T / n**2),
+                             index=names, columns=names)
+
+        complete = (codes >= 0).all(axis=0)
+        if not complete.all():
+            codes = codes[:, complete]
+            n = codes.shape[1]
+            agree, labels = _rater_counts(codes, k)
+
+        # The share of pairs of ratings of a subject that agree, and that
+        # would by chance
+        p_a = np.triu(agree, 1).sum() * 2 / (n * m * (m - 1))
+        p_e = np.sum((labels.sum(axis=0) / (n * m))**2)
+        fleiss = _kappa(p_a, p_e)
+
+    return pairwise, fleiss
+
+
+def _union_labels(labels, new):
+    """Add to the index `labels` those of `new` it lacks. Return them, and
+    the position of each of `new` among them."""
+    if labels is None:
+        return new, np.arange(len(new))
+
+    positions = labels.get_indexer(new)
+    if (positions < 0).any():
+        labels = labels.append(new[positions < 0])
+        positions = labels.get_indexer(new)
+
+    return labels, positions
+
+
+class AccuracyAccumulator:
+    """Computes `accuracy_metrics` a chunk of the data at a time, keeping
+    only the counts it needs. For example:
+
+        metrics = AccuracyAccumulator()
+        for chunk in chunks:
+            metrics.update(chunk["y"], chunk["pred"])
+        metrics.result()
+
+    Accumulators of different chunks, say in parallel workers, can be
+    combined with `merge`. The result is the same as that of
+    `accuracy_metrics` on all the data at once.
+
+    With `thresholds`, the predictions are scores, as in `accuracy_metrics`,
+    but the thresholds must be listed, since "all" would need every score
+    to be kept."""
+
+    def __init__(self, thresholds=None):
+        if thresholds is None:
+            self.thresholds = None
+            self.counts = np.zeros(4, dtype=np.int64)
+        elif isinstance(thresholds, str):
+            raise ValueError("Thresholds must be listed to be accumulated")
+        else:
+            self.thresholds = _sorted_thresholds(thresholds)
+            self.counts = np.zeros((2, len(self.thresholds) + 1),
+                                   dtype=np.int64)
+
+    def update(self, y_true, y_pred):
+        """Count a chunk of true outputs and predictions (or scores)."""
+        assert len(y_true) == len(y_pred), "Arrays must be the same length."
+
+        if self.thresholds is None:
+            self.counts += _confusion(y_true, y_pred)
+        else:
+            self.counts += np.stack(_threshold_bins(y_true, y_pred,
+                                                    self.thresholds))
+        return self
+
+    def merge(self, other):
+        """Add the counts of another accumulator to this one."""
+        if self.counts.shape != other.counts.shape or \
+                not np.array_equal(self.thresholds, other.thresholds):
+            raise ValueError("Can only merge accumulators with the same "
+                             "thresholds")
+
+        self.counts += other.counts
+        return self
+
+    def result(self):
+        """Return the table `accuracy_metrics` would."""
+        if self.thresholds is None:
+            return _confusion_table(*self.counts)
+        return _swept_table(self.thresholds, *_swept_counts(*self.counts))
+
+
+class MultiaccuracyAccumulator:
+    """Computes `multiaccuracy` a chunk of the data at a time, keeping only
+    the count of each pair of true and predicted classes. Use it as
+    `AccuracyAccumulator`."""
+
+    def __init__(self):
+        self.n = 0
+        self.true_labels = None
+        self.pred_labels = None
+        self.counts = None  # A sparse matrix, by labels in order seen
+
+    def update(self, y_true, y_pred):
+        """Count a chunk of true and predicted classes."""
+        counts, true_labels, pred_labels = _class_counts(y_true, y_pred,
+                                                         sparse=True)
+        self._add(len(y_true), counts, true_labels, pred_labels)
+        return self
+
+    def merge(self, other):
+        """Add the counts of another accumulator to this one."""
+        self._add(other.n, other.counts, other.true_labels, other.pred_labels)
+        return self
+
+    def _add(self, n, counts, true_labels, pred_labels):
+        from scipy.sparse import coo_matrix
+
+        self.n += n
+        if counts is None:
+            return
+        elif self.counts is None:
+            self.counts = counts
+            self.true_labels = true_labels
+            self.pred_labels = pred_labels
+            return
+
+        self.true_labels, rows = _union_labels(self.true_labels, true_labels)
+        self.pred_labels, cols = _union_labels(self.pred_labels, pred_labels)
+        shape = (len(self.true_labels), len(self.pred_labels))
+
+        counts = counts.tocoo()
+        self.counts.resize(shape)
+        self.counts = self.counts + coo_matrix(
+            (counts.data, (rows[counts.row], cols[counts.col])), shape=shape)
+
+    def result(self, normalize=False, totals=True, sparse=None):
+        """Return the table `multiaccuracy` would, with the same options."""
+        if self.counts is None:
+            return multiaccuracy([], [], normalize, totals, sparse)
+
+        rows = self.true_labels.argsort()
+        cols = self.pred_labels.argsort()
+        counts = self.counts.tocsr()[rows][:, cols]
+
+        if sparse is None:
+            sparse = counts.shape[0] * counts.shape[1] > _DENSE_CELLS
+        if not sparse:
+            counts = counts.toarray()
+
+        return _class_table(counts, self.true_labels[rows],
+                            self.pred_labels[cols], self.n, normalize, totals)
+
+
+class FuzzyAccuracyAccumulator:
+    """Computes `fuzzy_accuracy` a chunk of the data at a time. Use it as
+    `AccuracyAccumulator`."""
+
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        self.within = 0
+        self.n = 0
+
+    def update(self, y_true, y_pred):
+        """Count a chunk of true values and predictions."""
+        within = np.abs(np.array(y_true) - np.array(y_pred)) <= self.tolerance
+        self.within += np.count_nonzero(within)
+        self.n += within.size
+        return self
+
+    def merge(self, other):
+        """Add the counts of another accumulator to this one."""
+        self.within += other.within
+        self.n += other.n
+        return self
+
+    def result(self):
+        """Return the accuracy `fuzzy_accuracy` would."""
+        with np.errstate(invalid="ignore"):
+            return np.float64(self.within) / self.n
+
+
+class KappaAccumulator:
+    """Computes `cohens_kappa` a chunk of the data at a time, keeping only
+    the number of agreements and of each model's predictions of each label.
+    Use it as `AccuracyAccumulator`."""
+
+    def __init__(self):
+        self.n = 0
+        self.agree = 0
+        self.labels = None
+        self.counts = np.zeros((2, 0), dtype=np.int64)
+
+    def update(self, y_pred1, y_pred2):
+        """Count a chunk of the two models' predictions."""
+        from pandas import Index
+
+        assert len(y_pred1) == len(y_pred2), \
+            "Arrays must be the same length."
+
+        codes, labels = _rater_codes([y_pred1, y_pred2])
+        agree, counts = _rater_counts(codes, len(labels))
+        self._add(codes.shape[1], agree[0, 1], counts, Index(labels))
+        return self
+
+    def merge(self, other):
+        """Add the counts of another accumulator to this one."""
+        if other.labels is None:
+            self.n += other.n
+            return self
+
+        self._add(other.n, other.agree, other.counts, other.labels)
+        return self
+
+    def _add(self, n, agree, counts, labels):
+        self.n += n
+        self.agree += agree
+
+        self.labels, positions = _union_labels(self.labels, labels)
+        grown = np.zeros((2, len(self.labels)), dtype=np.int64)
+        grown[:, :self.counts.shape[1]] = self.counts
+        grown[:, positions] += counts
+        self.counts = grown
+
+    def result(self):
+        """Return the kappa `cohens_kappa` would, or NaN if nothing has been
+        counted."""
+        if self.n == 0:
+            return np.float64(np.nan)
+        return _kappa(self.agree / self.n,
+                      self.counts[0] @ self.counts[1] / self.n**2)
+
+
 def _norm(m, s, x):
     """Defines the normal distribution"""
     return np.exp(-(x - m)**2 / (2 * s**2)) / (s * (2 * np.pi)**(1/2))
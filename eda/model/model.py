@@ -27,10 +27,124 @@ TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+import mmap
+import numbers
+import os
+
 import numpy as np
 from sklearn.base import BaseEstimator, ClusterMixin
 from sklearn.exceptions import NotFittedError
 from sklearn.metrics import silhouette_score
+from eda._parallel import _n_workers
+from eda.model.neighbors import _metric, _neighbor_index, _Buffer, \
+    _MEMORY_LIMIT
+
+
+class _DisjointSet:
+    """Union-find over the integers 0 to n-1. The root of each set is its
+    smallest member."""
+
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, i):
+        while self.parent[i] != i:
+            # Path halving
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        """Merge the sets containing `i` and `j`. Returns whether they were
+        separate."""
+        i, j = self.find(i), self.find(j)
+        if i != j:
+            self.parent[max(i, j)] = min(i, j)
+        return i != j
+
+    def add(self, k):
+        """Add `k` new singleton sets, and return their members"""
+        n = self.parent.shape[0]
+        self.parent = np.concatenate([self.parent, np.arange(n, n + k)])
+        return np.arange(n, n + k)
+
+    def roots(self):
+        """Root of every member, by pointer jumping"""
+        while True:
+            grandparent = self.parent[self.parent]
+            if np.array_equal(grandparent, self.parent):
+                return self.parent
+            self.parent = grandparent
+
+
+def _as_array(X):
+    """Convert `X` to an array without copying it. A path to a .npy file is
+    memory-mapped, as is anything that already was."""
+    if isinstance(X, (str, os.PathLike)):
+        return np.load(X, mmap_mode="r")
+    elif isinstance(X, np.memmap):
+        return X
+    else:
+        return np.asarray(X)
+
+
+def _memmap_source(X):
+    """If `X` maps a whole file, describe it so that worker processes can map
+    it themselves rather than being sent a copy of the data"""
+    if isinstance(X, np.memmap) and isinstance(X.base, mmap.mmap):
+        order = "C" if X.flags.c_contiguous else "F"
+        return (X.filename, X.dtype, "r", X.offset, X.shape, order)
+
+
+def _cluster_slab(X, global_index, owned, inner, eps, min_samples, p,
+                  algorithm, memory_limit):
+    """Find the core points and local clusters of one slab of the data, for
+    parallel fitting. The slab holds every point within 2·eps of the points
+    it owns, so core status is exact for the `inner` points within eps of
+    them, and every edge between an owned core point and another core point
+    is seen. Returns:
+
+        - the global positions of the owned points
+        - which of them are core points
+        - the local cluster of each (meaningful only for core points)
+        - the number of neighbors of each
+        - global positions and local clusters of the inner core points owned
+          by other slabs, through which clusters are merged
+        - pairs of owned border points and local clusters they touch
+        - the number of local clusters, which are numbered from 0
+
+    `X` may also be the arguments to np.memmap() for the whole data set, in
+    which case the slab is read from the file."""
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    if isinstance(X, tuple):
+        X = np.memmap(*X)[global_index]
+
+    index = _neighbor_index(X, eps, p, algorithm, memory_limit)
+    inner = np.flatnonzero(inner)
+    query, point = index.radius_pairs(X[inner])
+    query = inner[query]
+
+    counts = np.bincount(query, minlength=X.shape[0])
+    core = np.zeros(X.shape[0], dtype=bool)
+    core[inner[counts[inner] >= min_samples]] = True
+
+    # Clusters are the connected components of the graph of core points
+    edges = core[query] & core[point]
+    graph = coo_matrix((np.ones(edges.sum(), dtype=bool),
+                        (query[edges], point[edges])),
+                       shape=(X.shape[0], X.shape[0]))
+    n_components, component = connected_components(graph, directed=False)
+
+    border = owned[query] & ~core[query] & core[point]
+    border = np.unique(np.column_stack([global_index[query[border]],
+                                        component[point[border]]]), axis=0)
+
+    halo = core & ~owned
+    return (global_index[owned], core[owned], component[owned],
+            counts[owned], global_index[halo], component[halo], border,
+            n_components)
 
 
 class DBSCAN(BaseEstimator, ClusterMixin):
@@ -50,87 +164,587 @@ class DBSCAN(BaseEstimator, ClusterMixin):
         p:           The p-norm to use for distance metric. 1 is equivalent to
                      taxicab distance. 2 is equivalent to Euclidean distance.
                      Default: 2
+        algorithm:   How to search for neighbors. "brute" compares each point
+                     to every other, which is O(n²) in time; "grid" buckets
+                     points into cells of side eps, and is fastest in two or
+                     three dimensions; "kd_tree" uses scipy's k-d tree. "auto"
+                     picks one based on the number of dimensions. Either index
+                     is O(n) in space. Default: "auto"
+        memory_limit: Approximate cap, in bytes, on the temporary arrays used
+                     to compute distances. Neighbors are found for whole
+                     batches of points at once, in tiles no larger than this.
+                     Default: 64 MiB
+        n_jobs:      The number of processes to fit with. The data are split
+                     into slabs along their widest axis, which overlap by
+                     2·eps so that each process sees every neighbor of the
+                     points it is responsible for. Each process finds core
+                     points and local clusters, and the local clusters are
+                     then merged with a union-find structure. The labels are
+                     identical to those of the serial algorithm. -1 uses all
+                     processors. Default: None (1)
+        silhouette:  How to compute the silhouette score, which needs the
+                     distance between every pair of points and so is O(n²)
+                     in time. "exact" (or True) uses every point; an
+                     integer uses a random sample of that many; "off" (or
+                     None or False) skips it. The score is only computed
+                     when .silhouette_ or .score() is first used.
+                     Default: "exact"
+        random_state: Seed for sampling points for the silhouette score.
+                     Default: 0
+
+    .fit() and .predict() accept a path to a .npy file, or an np.memmap, as
+    well as anything that can be converted to an array. Such data are read
+    in place, a block at a time, so they can be larger than memory, as long
+    as the brute-force or grid index is used (the k-d tree copies the data).
+    The grid costs 16 bytes of memory per point. .fit() can also write the
+    labels to a file, which is then memory-mapped as .labels_:
+
+        dbscan = DBSCAN(algorithm="grid").fit("points.npy", out="labels.npy")
+
+    Only the core points, which .predict() needs, are kept in memory.
 
     The .fit() method adds the following properties:
 
         .is_fit:      This is set to True
         .n_clusters_: The number of clusters, not including the "noise cluster"
-        .labels_:     A list of cluster labels corresponding to each value in
+        .labels_:     An array of cluster labels corresponding to each row of
                       the data passed to .fit()
+        .core_sample_indices_: Row positions of the core points, i.e., those
+                      with at least min_samples neighbors
+        .components_: The core points themselves. .predict() assigns new
+                      points to the cluster of the nearest core point closer
+                      than eps, or to the "noise cluster" if there is none
         .silhouette_: The silhouette score of the clustering, from -1 (worst)
-                      to 1 (best)"""
+                      to 1 (best), or NaN if it was not computed"""
 
-    def __init__(self, eps=0.5, min_samples=5, p=2):
+    def __init__(self, eps=0.5, min_samples=5, p=2, algorithm="auto",
+                 memory_limit=_MEMORY_LIMIT, n_jobs=None, silhouette="exact",
+                 random_state=0):
         # User-set
         self.eps = eps
         self.min_samples = min_samples
         self.p = p
+        self.algorithm = algorithm
+        self.memory_limit = memory_limit
+        self.n_jobs = n_jobs
+        self.silhouette = silhouette
+        self.random_state = random_state
 
         # Built-in
         self.noise_label = -1
 
         # Initialize
-        self._labels = dict()
         self.is_fit = False
 
     def _check_fit(self):
         if not self.is_fit:
             raise NotFittedError("You must fit the model to data first!")
 
-    @staticmethod
-    def _metric(x1, x2, p=2):
-        """Distance metric of order p"""
-        return (np.sum(np.abs((x1-x2)**p), axis=(x1.ndim-1)))**(1/p)
+    def _silhouette_mode(self):
+        """Return "exact", the number of points to sample, or None, for the
+        silhouette score"""
+        mode = self.silhouette
+        if mode is True or mode == "exact":
+            return "exact"
+        elif mode is None or mode is False or mode == "off":
+            return None
+        elif isinstance(mode, numbers.Integral) and mode > 0:
+            return int(mode)
+        else:
+            raise ValueError("silhouette must be \"exact\" (or True), "
+                             "\"off\" (or None or False), or a positive "
+                             f"number of points to sample, not {mode!r}")
+
+    _metric = staticmethod(_metric)
 
-    @staticmethod
-    def _k(key):
-        """Use a numpy array as a dictionary key"""
-        return hash(key.data.tobytes())
+    # Label for points not yet visited during .fit()
+    _unvisited = -2
 
-    def fit(self, X, y=None):
+    def _fit_serial(self, X, labels, counts):
         cluster = -1
-        X = np.array(X)
+        index = _neighbor_index(X, self.eps, self.p, self.algorithm,
+                                self.memory_limit)
+
+        labels[:] = self._unvisited
+        core = np.zeros(X.shape[0], dtype=bool)
 
-        for p in X:
+        # Number of points to read from X at a time
+        batch = max(1, self.memory_limit // (8 * X.shape[1]))
+
+        for i in range(X.shape[0]):
 
             # If already classified, don't bother
-            if self._k(p) in self._labels:
+            if labels[i] != self._unvisited:
                 continue
 
             # Find neighbors
-            neighbors = self._metric(X, p, self.p) < self.eps
+            neighbors = index.radius_neighbors(X[i])
+            counts[i] = neighbors.shape[0]
 
             # Assign to current cluster, or to "noise cluster"
-            if X[neighbors].shape[0] >= self.min_samples:
+            if neighbors.shape[0] >= self.min_samples:
                 cluster += 1
-                self._labels[self._k(p)] = cluster
+                labels[i] = cluster
+                core[i] = True
             else:
-                self._labels[self._k(p)] = self.noise_label
+                labels[i] = self.noise_label
                 continue
 
-            while X[neighbors].shape[0] > 0:
-                new_neighbors = np.repeat(False, neighbors.shape)
+            while neighbors.shape[0] > 0:
+                new_neighbors = [np.array([], dtype=np.intp)]
+
+                # Noise points we reach are border points. We already know
+                # they aren't core points, so there's no need to expand them.
+                labels[neighbors[labels[neighbors] == self.noise_label]] = \
+                    cluster
 
-                # Assign new neighbors to current cluster
-                for q in X[neighbors]:
-                    if self._k(q) not in self._labels or self._k(q) == -1:
-                        self._labels[self._k(q)] = cluster
-                        new_neighbors |= self._metric(X, q, self.p) < self.eps
+                # Assign new neighbors to current cluster, and expand the
+                # ones that turn out to be core points, a batch at a time
+                frontier = neighbors[labels[neighbors] == self._unvisited]
+                labels[frontier] = cluster
+                for start in range(0, frontier.shape[0], batch):
+                    batch_frontier = frontier[start:start+batch]
+                    blocks = index.radius_blocks(X[batch_frontier])
+                    for rows, query, point in blocks:
+                        block = batch_frontier[rows]
+                        counts[block] = np.bincount(query,
+                                                    minlength=block.shape[0])
+                        is_core = counts[block] >= self.min_samples
+                        core[block[is_core]] = True
+                        new_neighbors.append(np.unique(point[is_core[query]]))
 
                 # Add to running list and remove from "new" list
-                neighbors = new_neighbors.copy()
+                neighbors = np.unique(np.concatenate(new_neighbors))
+
+        return core, index
+
+    def _fit_parallel(self, X, labels, counts, n_processes):
+        from concurrent.futures import ProcessPoolExecutor
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        # Split the widest axis into slabs with equal numbers of points
+        axis = np.argmax(np.ptp(X, axis=0))
+        x = X[:, axis]
+        bounds = np.quantile(x, np.linspace(0, 1, n_processes + 1))
+        bounds[0], bounds[-1] = -np.inf, np.inf
+        source = _memmap_source(X)
+
+        with ProcessPoolExecutor(max_workers=n_processes) as pool:
+            futures = []
+            for lo, hi in zip(bounds, bounds[1:]):
+                slab = np.flatnonzero((x >= lo - 2*self.eps) &
+                                      (x <= hi + 2*self.eps))
+                xs = x[slab]
+                owned = (xs >= lo) & (xs < hi)
+                if not owned.any():
+                    continue
+                inner = (xs >= lo - self.eps) & (xs <= hi + self.eps)
+                futures.append(pool.submit(_cluster_slab,
+                                           source or X[slab], slab, owned,
+                                           inner, self.eps, self.min_samples,
+                                           self.p, self.algorithm,
+                                           self.memory_limit))
+            results = [future.result() for future in futures]
+
+        # Number local clusters uniquely across slabs. Halo points may belong
+        # to any local cluster, not just those of owned points, so each slab
+        # gets room for all of its clusters.
+        offsets = np.cumsum([0] + [result[7] for result in results])
+        core = np.zeros(X.shape[0], dtype=bool)
+        component = np.full(X.shape[0], -1)
+        for (owned, is_core, local, owned_counts, *_), offset in \
+                zip(results, offsets):
+            core[owned] = is_core
+            counts[owned] = owned_counts
+            component[owned[is_core]] = local[is_core] + offset
+
+        # A core point seen by another slab joins that slab's local cluster
+        # to the one it belongs to. The merged clusters are the connected
+        # components of the graph of these joins.
+        merged = np.concatenate(
+            [np.column_stack([component[halo], local + offset])
+             for (_, _, _, _, halo, local, _, _), offset
+             in zip(results, offsets)] + [np.empty((0, 2), dtype=np.intp)])
+        graph = coo_matrix((np.ones(merged.shape[0], dtype=bool),
+                            (merged[:, 0], merged[:, 1])),
+                           shape=(offsets[-1], offsets[-1]))
+        roots = connected_components(graph, directed=False)[1]
+
+        # Number clusters in order of their first core point, as the serial
+        # algorithm does
+        core_roots = roots[component[core]]
+        first = np.unique(core_roots, return_index=True)[1]
+        number = np.full(offsets[-1], self.noise_label, dtype=np.int32)
+        number[core_roots[np.sort(first)]] = np.arange(first.shape[0])
+
+        labels[:] = self.noise_label
+        labels[core] = number[core_roots]
+
+        # The serial algorithm fully expands each cluster before starting
+        # the next, so a border point goes to the lowest-numbered cluster
+        # that reaches it
+        border = np.concatenate([result[6] + [0, offset]
+                                 for result, offset in zip(results, offsets)] +
+                                [np.empty((0, 2), dtype=np.intp)])
+        border_labels = number[roots[border[:, 1]]]
+        order = np.lexsort((border_labels, border[:, 0]))
+        points, first = np.unique(border[order, 0], return_index=True)
+        labels[points] = border_labels[order][first]
+
+        return core, None
+
+    def fit(self, X, y=None, out=None):
+        """Cluster `X`. If `out` is given, the labels are written to it,
+        either a path to a new .npy file or an int32 array of the same
+        length as `X`."""
+        X = _as_array(X)
+
+        # Check the options before doing any work
+        self._silhouette_mode()
+
+        if out is None:
+            labels = np.empty(X.shape[0], dtype=np.int32)
+        elif isinstance(out, (str, os.PathLike)):
+            labels = np.lib.format.open_memmap(out, mode="w+",
+                                               dtype=np.int32,
+                                               shape=(X.shape[0],))
+        else:
+            labels = out
+
+        counts = np.empty(X.shape[0], dtype=np.int32)
+
+        n_processes = _n_workers(self.n_jobs)
+        if n_processes > 1 and X.shape[0] > 0:
+            core, index = self._fit_parallel(X, labels, counts, n_processes)
+        else:
+            core, index = self._fit_serial(X, labels, counts)
 
         self.is_fit = True
-        self.n_clusters_ = cluster + 1
-        self.labels_ = self.predict(X)
-        try:
-            self.silhouette_ = silhouette_score(X, self.labels_)
-        except ValueError:  # Only one cluster
-            self.silhouette_ = np.nan
+        self.n_clusters_ = int(labels.max(initial=-1)) + 1
+        self.core_sample_indices_ = np.flatnonzero(core)
+        self.components_ = X[core]
+        self._core_index = _neighbor_index(self.components_, self.eps, self.p,
+                                           self.algorithm, self.memory_limit)
+
+        # Kept for .partial_fit()
+        self._X = X
+        self._index = index
+        self._labels = labels
+        self._counts = counts
+        self._core = core
+        self._buffers = None
+        self._clusters = None
+
+        # Computed on demand
+        self._silhouette = np.nan if self._silhouette_mode() is None \
+            else None
+
+        return self
+
+    def partial_fit(self, X, y=None):
+        """Add the points in `X` to the clustering without refitting, as new
+        rows at the end of .labels_. Points newly within eps of enough
+        others become core points; this can create clusters, grow them, and
+        merge clusters that become density-connected. Only the neighborhoods
+        of the new points, and of the points promoted to core, are searched.
+        Merged clusters take the lowest of their labels, so labels may no
+        longer run consecutively. After each call:
+
+            .updated_indices_: Positions of the points whose labels were set
+                               or changed directly
+            .label_changes_:   Dictionary from each label merged away to the
+                               label that replaced it
+
+        The first call copies the data into memory, if it was memory-mapped.
+        If the model has not been fit, this is the same as .fit()."""
+        self._silhouette_mode()
+        if not self.is_fit:
+            self.fit(X)
+            self.updated_indices_ = np.arange(self._labels.shape[0])
+            self.label_changes_ = dict()
+            return self
+
+        X = np.asarray(X)
+        if self._buffers is None:
+            self._start_partial_fit()
+
+        buffers = self._buffers
+        n, m = self._index.X.shape[0], X.shape[0]
+        new = np.arange(n, n + m)
+
+        self._index.add(X)
+        buffers["labels"].append(np.full(m, self.noise_label, dtype=np.int32))
+        buffers["counts"].append(np.zeros(m, dtype=np.int32))
+        buffers["core"].append(np.zeros(m, dtype=bool))
+        labels, counts, core = (buffers[name].array
+                                for name in ("labels", "counts", "core"))
+
+        # Count the new points' neighbors, and add the new points to the
+        # counts of the old ones
+        query, point = self._index.radius_pairs(X)
+        counts[new] = np.bincount(query, minlength=m)
+        np.add.at(counts, point[point < n], 1)
+
+        # Promote points that now have enough neighbors
+        reached = np.unique(np.concatenate([new, point[point < n]]))
+        promoted = reached[~core[reached] &
+                           (counts[reached] >= self.min_samples)]
+        core[promoted] = True
+
+        # We already have the neighbors of the new points; find those of the
+        # old points that were promoted
+        old_promoted = promoted[promoted < n]
+        old_query, old_point = self._index.radius_pairs(
+            self._index.X[old_promoted])
+        source = np.concatenate([new[query], old_promoted[old_query]])
+        target = np.concatenate([point, old_point])
+
+        # Group the promoted points into the components they form among
+        # themselves, and find the clusters each component touches
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        is_promoted = np.zeros(n + m, dtype=bool)
+        is_promoted[promoted] = True
+        local = np.searchsorted(promoted, source)
+        among = is_promoted[source] & is_promoted[target]
+        graph = coo_matrix((np.ones(among.sum(), dtype=bool),
+                            (local[among],
+                             np.searchsorted(promoted, target[among]))),
+                           shape=(promoted.shape[0], promoted.shape[0]))
+        n_components, component = connected_components(graph,
+                                                       directed=False)
+
+        roots = self._clusters.roots()
+        touches = is_promoted[source] & core[target] & ~is_promoted[target]
+        touched = np.unique(np.column_stack([
+            component[local[touches]], roots[labels[target[touches]]]]),
+            axis=0)
+
+        # Each component joins the lowest-numbered cluster it touches, and
+        # the others merge into it. Components that touch none are new
+        # clusters.
+        merged = set()
+        joins = np.full(n_components, -1, dtype=np.int32)
+        for k, cluster in touched:
+            if joins[k] < 0:
+                joins[k] = cluster
+            elif self._clusters.union(joins[k], cluster):
+                merged |= {int(joins[k]), int(cluster)}
+                self.n_clusters_ -= 1
+        unjoined = np.flatnonzero(joins < 0)
+        joins[unjoined] = self._clusters.add(unjoined.shape[0])
+        self.n_clusters_ += unjoined.shape[0]
+        labels[promoted] = joins[component]
+
+        roots = self._clusters.roots()
+        label_changes = {cluster: int(roots[cluster])
+                         for cluster in sorted(merged)
+                         if roots[cluster] != cluster}
+
+        # A new point that isn't a core point borders the lowest-numbered
+        # cluster it reaches, and a noise point within eps of a promoted point
+        # now borders its cluster
+        borders = ~core[source] & core[target] & (source >= n)
+        reached = is_promoted[source] & ~core[target] & \
+            (labels[target] == self.noise_label)
+        bordered = np.concatenate([source[borders], target[reached]])
+        bordered_labels = roots[np.concatenate([labels[target[borders]],
+                                                labels[source[reached]]])]
+        order = np.lexsort((bordered_labels, bordered))
+        bordered, first = np.unique(bordered[order], return_index=True)
+        labels[bordered] = bordered_labels[order][first]
+
+        # Add the promoted points to those .predict() searches
+        self._core_index.add(self._index.X[promoted])
+        buffers["core_indices"].append(promoted)
+        self.core_sample_indices_ = buffers["core_indices"].array
+        self.components_ = self._core_index.X
+
+        self._X = self._index.X
+        self._labels, self._counts, self._core = labels, counts, core
+        self._merged = self._merged or bool(label_changes)
+        self._silhouette = np.nan if self._silhouette_mode() is None \
+            else None
+
+        self.updated_indices_ = np.unique(np.concatenate([new, promoted,
+                                                          bordered]))
+        self.label_changes_ = label_changes
+
+        return self
+
+    def _start_partial_fit(self):
+        """Set up the state that .partial_fit() updates"""
+        if self._index is None:
+            self._index = _neighbor_index(self._X, self.eps, self.p,
+                                          self.algorithm, self.memory_limit)
+
+        self._buffers = {
+            "labels": _Buffer(self._labels),
+            "counts": _Buffer(self._counts),
+            "core": _Buffer(self._core),
+            "core_indices": _Buffer(self.core_sample_indices_),
+        }
+        self._clusters = _DisjointSet(self.n_clusters_)
+        self._merged = False
+
+    @property
+    def labels_(self):
+        # Relabel the members of merged clusters only when asked to
+        if self._clusters is not None and self._merged:
+            clustered = self._labels >= 0
+            self._labels[clustered] = \
+                self._clusters.roots()[self._labels[clustered]]
+            self._merged = False
+
+        return self._labels
+
+    @property
+    def silhouette_(self):
+        self._check_fit()
+        if self._silhouette is None:
+            X, labels = self._X, self.labels_
+            size = self._silhouette_mode()
+            if size != "exact" and size < X.shape[0]:
+                sample = np.sort(np.random.RandomState(self.random_state)
+                                 .choice(X.shape[0], size, replace=False))
+                X, labels = X[sample], labels[sample]
+
+            try:
+                self._silhouette = silhouette_score(X, labels)
+            except ValueError:  # Only one cluster
+                self._silhouette = np.nan
+
+        return self._silhouette
+
+    def fit_many(self, X, y=None, eps=None):
+        """Cluster `X` at each of several values of eps, from a single search
+        for neighbors within the largest. As in OPTICS, each point's core
+        distance is the distance within which it has min_samples neighbors,
+        and two core points are joined at a given eps when both their core
+        distances and the distance between them are below it. A minimum
+        spanning tree of these joins holds every clustering, so each one is
+        O(n) to extract. Example usage:
+
+            dbscan = DBSCAN().fit_many(X, eps=[0.1, 0.2, 0.5, 1])
+            dbscan.sweep_.plot(subplots=True)
+
+        The labels at each eps are the same as .fit() would give. This holds
+        every pair of points within the largest eps in memory. It adds the
+        following properties:
+
+            .eps_:             The values of eps, in the order given
+            .core_distances_:  The core distance of each point, or infinity
+                               if it is not a core point at any eps
+            .labels_sweep_:    An array of labels for each eps, one row per
+                               eps
+            .sweep_:           A data frame of the number of clusters and
+                               the fraction of points that are noise, indexed
+                               by eps"""
+        from pandas import DataFrame
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components, \
+            minimum_spanning_tree
+
+        X = _as_array(X)
+        eps = np.atleast_1d(np.array(self.eps if eps is None else eps,
+                                     dtype=float))
+        n = X.shape[0]
+        index = _neighbor_index(X, eps.max(), self.p, self.algorithm,
+                                self.memory_limit)
+
+        # Find every pair of neighbors, and each point's core distance: the
+        # min_samples-th smallest distance to its neighbors, itself included
+        core_distances = np.full(n, np.inf)
+        sources, targets, distances = [], [], []
+        batch = max(1, self.memory_limit // (8 * X.shape[1]))
+        for start in range(0, n, batch):
+            for rows, query, point in \
+                    index.radius_blocks(X[start:start+batch]):
+                query = query + start + rows.start
+                dist = _metric(X[point], X[query], self.p)
+
+                order = np.lexsort((dist, query))
+                query, point, dist = query[order], point[order], dist[order]
+                firsts, lengths = np.unique(query, return_index=True,
+                                            return_counts=True)[1:]
+                enough = lengths >= self.min_samples
+                core_distances[query[firsts[enough]]] = \
+                    dist[firsts[enough] + self.min_samples - 1]
+
+                other = query != point
+                sources.append(query[other])
+                targets.append(point[other])
+                distances.append(dist[other])
+
+        source, target, distance = (np.concatenate(pairs + [[]])
+                                    for pairs in (sources, targets, distances))
+        source, target = source.astype(np.intp), target.astype(np.intp)
+
+        # Two core points are joined below their mutual reachability distance
+        reach = np.maximum(distance, np.maximum(core_distances[source],
+                                                core_distances[target]))
+        joined = np.isfinite(reach) & (source < target)
+
+        # Sparse matrices drop zeros, so stand in a weight below all others
+        weights = reach[joined]
+        tiny = weights[weights > 0].min(initial=1) / 2
+        graph = coo_matrix((np.where(weights > 0, weights, tiny),
+                            (source[joined], target[joined])), shape=(n, n))
+        tree = minimum_spanning_tree(graph).tocoo()
+        tree_weights = np.where(tree.data == tiny, 0, tree.data)
+
+        labels = np.full((eps.shape[0], n), self.noise_label, dtype=np.int32)
+        for row, e in zip(labels, eps):
+            core = core_distances < e
+            edges = tree_weights < e
+            component = connected_components(
+                coo_matrix((np.ones(edges.sum(), dtype=bool),
+                            (tree.row[edges], tree.col[edges])),
+                           shape=(n, n)),
+                directed=False)[1]
+
+            # Number clusters in order of their first core point, as .fit()
+            # does
+            core_components = component[core]
+            first = np.unique(core_components, return_index=True)[1]
+            number = np.empty(n, dtype=np.int32)
+            number[core_components[np.sort(first)]] = \
+                np.arange(first.shape[0])
+            row[core] = number[core_components]
+
+            # Border points go to the lowest-numbered cluster that reaches
+            # them
+            border = ~core[source] & core[target] & (distance < e)
+            border_labels = row[target[border]]
+            order = np.lexsort((border_labels, source[border]))
+            points, first = np.unique(source[border][order],
+                                      return_index=True)
+            row[points] = border_labels[order][first]
+
+        self.eps_ = eps
+        self.core_distances_ = core_distances
+        self.labels_sweep_ = labels
+        self.sweep_ = DataFrame({
+            "n_clusters": labels.max(axis=1, initial=-1) + 1,
+            "noise_fraction": np.mean(labels == self.noise_label, axis=1),
+        }, index=eps)
+        self.sweep_.index.name = "eps"
+
+        return self
 
     def predict(self, X):
         self._check_fit()
-        return np.array([self._labels[self._k(p)] for p in np.array(X)])
+        X = _as_array(X)
+
+        labels = np.full(X.shape[0], self.noise_label, dtype=np.int32)
+        nearest = self._core_index.nearest(X)
+        found = nearest >= 0
+        labels[found] = \
+            self.labels_[self.core_sample_indices_[nearest[found]]]
+
+        return labels
 
     def score(self):
         self._check_fit()
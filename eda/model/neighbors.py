@@ -0,0 +1,472 @@
+"""
+File: neighbors.py
+Author: Alex Klapheke
+Email: alexklapheke@gmail.com
+Github: https://github.com/alexklapheke
+Description: Radius-neighbor search backends for DBSCAN
+
+Copyright © 2020 Alex Klapheke
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+from itertools import product
+
+import numpy as np
+
+
+# Default cap, in bytes, on the temporary arrays used to compute distances
+_MEMORY_LIMIT = 2**26
+
+
+def _metric(x1, x2, p=2):
+    """Distance metric of order p"""
+    return (np.sum(np.abs(x1-x2)**p, axis=(x1.ndim-1)))**(1/p)
+
+
+def _ranges(starts, stops):
+    """Concatenate the ranges [start, stop) without a Python loop. Also
+    returns the length of each range."""
+    counts = stops - starts
+    firsts = np.cumsum(counts) - counts
+    return (np.arange(counts.sum()) + np.repeat(starts - firsts, counts),
+            counts)
+
+
+def _tiles(n_queries, n_points, cell_bytes, memory_limit):
+    """Split an n_queries × n_points array into tiles of at most
+    `memory_limit` bytes, given the bytes needed per cell. Yields pairs of
+    slices, row-major, so each block of queries is finished before the
+    next begins."""
+    if n_queries == 0 or n_points == 0:
+        return
+
+    cells = max(1, memory_limit // cell_bytes)
+    rows = min(n_queries, max(1, int(cells**0.5)))
+    cols = min(n_points, max(1, cells // rows))
+    rows = min(n_queries, max(1, cells // cols))
+
+    for q in range(0, n_queries, rows):
+        for x in range(0, n_points, cols):
+            yield (slice(q, min(q + rows, n_queries)),
+                   slice(x, min(x + cols, n_points)))
+
+
+def _powered_distances(Q, X, p=2, memory_limit=_MEMORY_LIMIT):
+    """Yield (query slice, point slice, distance**p) for tiles covering every
+    pair of rows in `Q` and `X`. For p=2 each tile is a matrix product,
+    ‖a‖² + ‖b‖² − 2ab, which is far faster than broadcasting differences
+    but can be off by a few ulps of the squared norms. Also yields that
+    error bound, which is zero for other values of p."""
+    if p == 2:
+        q_norms = np.einsum("ij,ij->i", Q, Q, dtype=float)
+        x_norms = np.einsum("ij,ij->i", X, X, dtype=float)
+        cell_bytes = 8 * 3
+    else:
+        cell_bytes = 8 * 3 * max(1, X.shape[1])
+
+    for rows, cols in _tiles(Q.shape[0], X.shape[0], cell_bytes,
+                             memory_limit):
+        if p == 2:
+            dist = np.dot(Q[rows], X[cols].T).astype(float, copy=False)
+            dist *= -2
+            dist += q_norms[rows, np.newaxis]
+            dist += x_norms[np.newaxis, cols]
+            np.maximum(dist, 0, out=dist)
+            error = 8 * np.finfo(float).eps * \
+                (q_norms[rows].max() + x_norms[cols].max())
+        else:
+            dist = np.sum(np.abs(Q[rows, np.newaxis] - X[np.newaxis, cols])**p,
+                          axis=2)
+            error = 0
+        yield rows, cols, dist, error
+
+
+def _radius_tile(Q, X, dist, error, eps, p=2):
+    """(query, point) pairs of a tile strictly closer than `eps`. Pairs too
+    close to the boundary to trust the tile's error are checked exactly."""
+    limit = eps**p
+    query, point = np.nonzero(dist < limit - error)
+    if error:
+        q_edge, x_edge = np.nonzero(np.abs(dist - limit) <= error)
+        near = _metric(X[x_edge], Q[q_edge], p) < eps
+        query = np.concatenate([query, q_edge[near]])
+        point = np.concatenate([point, x_edge[near]])
+    return query, point
+
+
+def _nearest_pairs(query, point, dist, n_queries, eps):
+    """Given flat arrays of candidate pairs and their distances, return for
+    each query the nearest point closer than `eps`, or -1 if there is none."""
+    nearest = np.full(n_queries, -1, dtype=np.intp)
+    near = dist < eps
+    query, point, dist = query[near], point[near], dist[near]
+
+    # Sort by query, then distance, and keep the first of each query
+    order = np.lexsort((dist, query))
+    first = np.unique(query[order], return_index=True)[1]
+    nearest[query[order][first]] = point[order][first]
+
+    return nearest
+
+
+def _tile_blocks(Q, X, p=2, memory_limit=_MEMORY_LIMIT):
+    """Group the kernel's tiles by block of queries"""
+    block = None
+    for rows, cols, dist, error in _powered_distances(Q, X, p, memory_limit):
+        if block is not None and rows != block[0]:
+            yield block
+        if block is None or rows != block[0]:
+            block = (rows, [])
+        block[1].append((cols, dist, error))
+    if block is not None:
+        yield block
+
+
+def _brute_radius_blocks(Q, X, eps, p=2, memory_limit=_MEMORY_LIMIT):
+    """Radius neighbors of `Q` in `X` by brute force; see
+    _Neighbors.radius_blocks()"""
+    for rows, tiles in _tile_blocks(Q, X, p, memory_limit):
+        queries, points = [np.array([], dtype=np.intp)], \
+            [np.array([], dtype=np.intp)]
+        for cols, dist, error in tiles:
+            query, point = _radius_tile(Q[rows], X[cols], dist, error, eps, p)
+            queries.append(query)
+            points.append(point + cols.start)
+        yield rows, np.concatenate(queries), np.concatenate(points)
+
+
+def _brute_nearest(Q, X, eps, p=2, memory_limit=_MEMORY_LIMIT):
+    """Nearest neighbors of `Q` in `X` by brute force; see
+    _Neighbors.nearest()"""
+    nearest = np.full(Q.shape[0], -1, dtype=np.intp)
+    if X.shape[0] == 0:
+        return nearest
+
+    for rows, tiles in _tile_blocks(Q, X, p, memory_limit):
+        best = np.full(rows.stop - rows.start, np.inf)
+        for cols, dist, error in tiles:
+            tile_best = np.argmin(dist, axis=1)
+            tile_dist = dist[np.arange(tile_best.shape[0]), tile_best]
+            better = tile_dist < best
+            best[better] = tile_dist[better]
+            nearest[rows][better] = tile_best[better] + cols.start
+
+    # Distances from the kernel are approximate; check the threshold exactly
+    found = np.flatnonzero(nearest >= 0)
+    far = _metric(X[nearest[found]], Q[found], p) >= eps
+    nearest[found[far]] = -1
+
+    return nearest
+
+
+class _Buffer:
+    """An array that can be appended to in amortized O(1) time per row, by
+    doubling its capacity whenever it runs out"""
+
+    def __init__(self, array):
+        self._data = np.array(array)
+        self._n = self._data.shape[0]
+
+    @property
+    def array(self):
+        return self._data[:self._n]
+
+    def append(self, rows):
+        n = self._n + rows.shape[0]
+        if n > self._data.shape[0]:
+            data = np.empty((max(n, 2 * self._data.shape[0]),) +
+                            self._data.shape[1:], dtype=self._data.dtype)
+            data[:self._n] = self.array
+            self._data = data
+        self._data[self._n:n] = rows
+        self._n = n
+
+
+class _Neighbors:
+    """Common interface of the neighbor indexes. Subclasses implement
+    ._build(), ._radius_blocks() and ._nearest() over the points present at
+    the last build.
+
+    Points can be added with .add(). They are searched by brute force until
+    there are more than a few times the square root of the number of points
+    already built, and then the index is rebuilt. This balances the cost of
+    the brute-force search against that of rebuilding, making both O(√n)
+    per point."""
+
+    # Multiple of the square root of the number of built points at which to
+    # rebuild the index
+    _rebuild_factor = 4
+
+    def __init__(self, X, eps, p=2, memory_limit=_MEMORY_LIMIT):
+        self.X = X
+        self.eps = eps
+        self.p = p
+        self.memory_limit = memory_limit
+        self._buffer = None
+        self._build()
+        self._n_built = X.shape[0]
+
+    def _build(self):
+        pass
+
+    def add(self, X):
+        """Append the rows of `X` to the index. Their positions follow those
+        of the points already there. The first call copies the data into
+        memory."""
+        if self._buffer is None:
+            self._buffer = _Buffer(self.X)
+        self._buffer.append(X)
+        self.X = self._buffer.array
+
+        if self.X.shape[0] - self._n_built > \
+           self._rebuild_factor * self._n_built**0.5:
+            self._build()
+            self._n_built = self.X.shape[0]
+
+    def radius_blocks(self, Q):
+        """Yield (rows, query, point) for consecutive blocks of `Q`, where
+        `rows` is the slice of `Q` in the block, and `query` and `point` are
+        flat arrays pairing each query row (relative to the block) with the
+        positions of the points strictly closer than `eps`, in no particular
+        order."""
+        pending = self.X[self._n_built:]
+        for rows, query, point in self._radius_blocks(Q):
+            if pending.shape[0]:
+                queries, points = [query], [point]
+                for block, pending_query, pending_point in \
+                        _brute_radius_blocks(Q[rows], pending, self.eps,
+                                             self.p, self.memory_limit):
+                    queries.append(pending_query + block.start)
+                    points.append(pending_point + self._n_built)
+                query, point = np.concatenate(queries), \
+                    np.concatenate(points)
+            yield rows, query, point
+
+    def radius_pairs(self, Q):
+        """Flat arrays pairing each row of `Q` with the positions of the
+        points strictly closer than `eps` to it"""
+        queries, points = [np.array([], dtype=np.intp)], \
+            [np.array([], dtype=np.intp)]
+        for rows, query, point in self.radius_blocks(Q):
+            queries.append(query + rows.start)
+            points.append(point)
+        return np.concatenate(queries), np.concatenate(points)
+
+    def radius_neighbors(self, x):
+        """Positions of the points strictly closer than `eps` to `x`"""
+        return self.radius_pairs(x[np.newaxis])[1]
+
+    def nearest(self, Q):
+        """Position of the nearest point closer than `eps` to each row of `Q`,
+        or -1 if there is none"""
+        nearest = self._nearest(Q)
+
+        pending = self.X[self._n_built:]
+        if pending.shape[0]:
+            other = _brute_nearest(Q, pending, self.eps, self.p,
+                                   self.memory_limit)
+            found = np.flatnonzero(other >= 0)
+            other = other[found] + self._n_built
+
+            # Keep whichever of the two is nearer
+            dist = _metric(self.X[other], Q[found], self.p)
+            current = nearest[found]
+            current_dist = np.full(found.shape[0], np.inf)
+            current_dist[current >= 0] = _metric(
+                self.X[current[current >= 0]], Q[found[current >= 0]], self.p)
+            nearer = dist < current_dist
+            nearest[found[nearer]] = other[nearer]
+
+        return nearest
+
+
+class _BruteNeighbors(_Neighbors):
+    """Compare each query against every point, one tile of at most
+    `memory_limit` bytes at a time. Needs no memory beyond the data itself,
+    but each query is O(n)."""
+
+    # There is nothing to build, so search every point the same way
+    _rebuild_factor = 0
+
+    def _radius_blocks(self, Q):
+        return _brute_radius_blocks(Q, self.X, self.eps, self.p,
+                                    self.memory_limit)
+
+    def _nearest(self, Q):
+        return _brute_nearest(Q, self.X, self.eps, self.p, self.memory_limit)
+
+
+class _GridNeighbors(_Neighbors):
+    """Bucket points into cubic cells of side `eps`. Any point closer than
+    `eps` in a p-norm is also closer than `eps` along every axis, so it must
+    lie in the same cell as the query or in one adjacent to it. Only those
+    3^d cells are scanned, which makes queries roughly O(1) on data of low
+    dimension.
+
+    Each cell is reduced to a single hashed int64 key, so the index costs two
+    integer arrays of length n regardless of dimension. Hash collisions only
+    add candidates, which are then filtered by exact distance."""
+
+    def __init__(self, X, eps, p=2, memory_limit=_MEMORY_LIMIT):
+        if X.shape[1] > 8:
+            raise ValueError("The grid index scans 3^d cells per query, so "
+                             "it is limited to 8 dimensions.")
+
+        # Fixed odd multipliers, so that keys are reproducible between runs
+        rng = np.random.RandomState(0)
+        self._mult = rng.randint(1, 2**62, size=X.shape[1]) | 1
+        self._offsets = np.array(list(product((-1, 0, 1),
+                                              repeat=X.shape[1])))
+
+        super().__init__(X, eps, p, memory_limit)
+
+    def _build(self):
+        # Hash a block at a time, in case X is memory-mapped
+        keys = np.empty(self.X.shape[0], dtype=np.int64)
+        rows = max(1, self.memory_limit // (8 * 2 * self.X.shape[1]))
+        for start in range(0, self.X.shape[0], rows):
+            keys[start:start+rows] = \
+                self._keys(np.floor(self.X[start:start+rows] / self.eps))
+
+        self._order = np.argsort(keys, kind="stable")
+        self._keys_sorted = keys[self._order]
+
+    def _keys(self, cells):
+        """Hash integer cell coordinates to one int64 per row"""
+        # Overflow is intentional; this is a hash, not an index
+        with np.errstate(over="ignore"):
+            return np.sum(cells.astype(np.int64) * self._mult, axis=-1)
+
+    def _cell_ranges(self, Q):
+        """Ranges of the sorted index covering the cells adjacent to each row
+        of `Q`, as two arrays of shape (len(Q), 3^d)"""
+        cells = np.floor(Q / self.eps)[:, np.newaxis] + self._offsets
+        keys = np.sort(self._keys(cells), axis=1)
+
+        starts = np.searchsorted(self._keys_sorted, keys, side="left")
+        stops = np.searchsorted(self._keys_sorted, keys, side="right")
+
+        # Two offsets can hash to the same key; only scan that cell once
+        repeated = np.zeros(keys.shape, dtype=bool)
+        repeated[:, 1:] = keys[:, 1:] == keys[:, :-1]
+        stops[repeated] = starts[repeated]
+
+        return starts, stops
+
+    def _candidates(self, Q):
+        """Yield (rows, query, point) for blocks of `Q`, pairing each query
+        row with every point in a cell adjacent to it. Blocks are sized so
+        that the pairs, and the differences computed from them, fit in
+        `memory_limit` bytes."""
+        pair_bytes = 8 * (3 * self.X.shape[1] + 4)
+        rows = max(1, self.memory_limit // (8 * 3 * self._offsets.shape[0]))
+
+        for block in range(0, Q.shape[0], rows):
+            starts, stops = self._cell_ranges(Q[block:block+rows])
+
+            # Split further so that each piece has a bounded number of pairs
+            counts = np.sum(stops - starts, axis=1)
+            firsts = np.cumsum(counts) - counts
+            splits = np.unique(firsts // max(1, self.memory_limit //
+                                             pair_bytes),
+                               return_index=True)[1]
+
+            for lo, hi in zip(splits, np.append(splits[1:], counts.shape[0])):
+                positions, lengths = _ranges(starts[lo:hi].ravel(),
+                                             stops[lo:hi].ravel())
+                query = np.repeat(np.arange(lengths.shape[0]) //
+                                  starts.shape[1], lengths)
+                yield (slice(block + lo, block + hi), query,
+                       self._order[positions])
+
+    def _radius_blocks(self, Q):
+        for rows, query, point in self._candidates(Q):
+            near = _metric(self.X[point], Q[rows][query], self.p) < self.eps
+            yield rows, query[near], point[near]
+
+    def _nearest(self, Q):
+        nearest = np.full(Q.shape[0], -1, dtype=np.intp)
+
+        for rows, query, point in self._candidates(Q):
+            dist = _metric(self.X[point], Q[rows][query], self.p)
+            nearest[rows] = _nearest_pairs(query, point, dist,
+                                           rows.stop - rows.start, self.eps)
+
+        return nearest
+
+
+class _KDTreeNeighbors(_Neighbors):
+    """Wrap scipy's k-d tree, which scales to more dimensions than the grid.
+    The tree's inclusive radius is re-checked against our strict one, so the
+    result is identical to brute force."""
+
+    def _build(self):
+        from scipy.spatial import cKDTree
+
+        self._tree = cKDTree(self.X)
+
+    def _radius_blocks(self, Q):
+        # The tree returns Python lists, so we can only guess at their size;
+        # budget for a few dozen neighbors per query
+        size = max(1, self.memory_limit // (8 * 3 * 64 * (Q.shape[1] + 1)))
+
+        for start in range(0, Q.shape[0], size):
+            rows = slice(start, min(start + size, Q.shape[0]))
+            block = Q[rows]
+            lists = self._tree.query_ball_point(block, self.eps, p=self.p)
+            lengths = np.array([len(points) for points in lists],
+                               dtype=np.intp)
+            query = np.repeat(np.arange(block.shape[0]), lengths)
+            point = np.fromiter((j for points in lists for j in points),
+                                dtype=np.intp, count=lengths.sum())
+
+            near = _metric(self.X[point], block[query], self.p) < self.eps
+            yield rows, query[near], point[near]
+
+    def _nearest(self, Q):
+        dist, nearest = self._tree.query(Q, k=1, p=self.p,
+                                         distance_upper_bound=self.eps)
+        nearest[~(dist < self.eps)] = -1
+        return nearest
+
+
+_ALGORITHMS = {
+    "brute":   _BruteNeighbors,
+    "grid":    _GridNeighbors,
+    "kd_tree": _KDTreeNeighbors,
+}
+
+
+def _neighbor_index(X, eps, p=2, algorithm="auto", memory_limit=_MEMORY_LIMIT):
+    """Build the radius-neighbor index named by `algorithm`. "auto" uses the
+    grid in up to three dimensions, where 3^d cells stay cheap, a k-d tree up
+    to fifteen, and brute force beyond that."""
+    if algorithm == "auto":
+        d = X.shape[1]
+        algorithm = "grid" if d <= 3 else "kd_tree" if d <= 15 else "brute"
+
+    try:
+        index = _ALGORITHMS[algorithm]
+    except KeyError:
+        raise ValueError("Allowed algorithms: auto, " +
+                         ", ".join(_ALGORITHMS.keys()))
+
+    return index(X, eps, p, memory_limit)
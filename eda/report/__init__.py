@@ -1,2 +1,4 @@
 from .report import sparkline
+from .report import sparkline_many
+from .report import SparklineBuffer
 from .report import data_dictionary
@@ -31,88 +31,405 @@ from pandas import DataFrame, Series
 import numpy as np
 
 
-def sparkline(series, width=10, plottype="bar", hist=False):
-    """Generate a basic sparkline graph, consisting of `width` bars,
-    of an iterable of numeric data. Each bar represents the mean of
-    that fraction of the data. Allowed `plottype`s are "bar", "line",
-    and "shade". If `hist` is true, plot a histogram of the data in
-    `width` bins."""
-    from pandas.api.types import is_numeric_dtype, is_datetime64_any_dtype
-
-    if len(series) == 0:
+def _hist_levels(values, smin, smax, width):
+    """Count the (non-missing) `values` into `width` equal-width bins running
+    from `smin` to `smax`, in one vectorized pass. If the values take fewer
+    distinct levels than there are bins, use a bin for each level."""
+    if width == 0:
+        return np.zeros(0, dtype=int)
+
+    edges = np.linspace(smin, smax, width, endpoint=False)
+
+    # Bins are closed on the left, and the last is open-ended so that the
+    # maximum is counted
+    levels = np.bincount(np.searchsorted(edges, values, side="right") - 1,
+                         minlength=width)
+
+    # Only fall back on counting the distinct values (a sort) when some bin
+    # is empty, since otherwise there must be at least `width` of them
+    if np.count_nonzero(levels) < width:
+        distinct = len(np.unique(values))
+        if distinct < width:
+            return _hist_levels(values, smin, smax, distinct)
+
+    return levels
+
+
+def _hist_levels_many(values, smin, smax, width):
+    """Like `_hist_levels`, for each row of the 2-D `values` (with NaN for
+    missing values) at once. Return the bin counts, and the number of bins
+    used in each row, as rows with few distinct values use fewer bins; the
+    counts for those are packed to the left, with zeros after them."""
+    rows = values.shape[0]
+    levels = np.zeros((rows, width), dtype=np.int64)
+    widths = np.full(rows, width)
+    if width == 0 or rows == 0:
+        return levels, widths
+
+    # The same edges as np.linspace(smin, smax, width, endpoint=False) for
+    # each row, which the arithmetic below follows step for step
+    delta = (smax - smin)[:, np.newaxis]
+    step = delta / width
+    steps = np.arange(width, dtype=float)
+    with np.errstate(all="ignore"):
+        edges = np.where(step == 0, steps / width * delta, steps * step) \
+            + smin[:, np.newaxis]
+
+    # An edge at or below a value puts it in that bin or a later one,
+    # which gives the bin of each value, or -1 if it is missing
+    bins = np.full(values.shape, -1)
+    for k in range(width):
+        bins += values >= edges[:, k, np.newaxis]
+
+    offsets = np.arange(rows)[:, np.newaxis] * width
+    levels = np.bincount((bins + offsets)[bins >= 0],
+                         minlength=rows * width).reshape(rows, width)
+
+    # As in `_hist_levels`, rows with an empty bin and fewer distinct
+    # values than bins are counted again with a bin for each value
+    sparse = np.flatnonzero((levels == 0).any(axis=1))
+    if len(sparse):
+        ordered = np.sort(values[sparse], axis=1)
+        present = ~np.isnan(ordered)
+        distinct = present[:, 0] + np.count_nonzero(
+            (ordered[:, 1:] != ordered[:, :-1]) & present[:, 1:], axis=1)
+        for d in np.unique(distinct[distinct < width]):
+            idx = sparse[distinct == d]
+            levels[idx] = 0
+            levels[idx, :d] = _hist_levels_many(values[idx], smin[idx],
+                                                smax[idx], d)[0]
+            widths[idx] = d
+
+    return levels, widths
+
+
+def _hist_graph(levels, chars):
+    """Draw histogram bin counts as a sparkline using `chars`."""
+    if len(levels) == 0:
         return ""
 
-    np.seterr('raise')
+    heights = np.rint(levels / levels.max() * (len(chars) - 1)).astype(int)
+    return "".join(chars[h] for h in heights)
+
+
+def _bar_heights(values, smin, smax, width, nchars):
+    """Split each row of the 2-D `values` into `width` chunks, each at least
+    one value long, and return the height, from 0 to `nchars` - 1, of the
+    mean of the non-missing values in each, or -1 if it has none."""
+    starts = np.linspace(0, values.shape[1], width+1)[:-1].astype(int)
+    present = ~np.isnan(values)
+    with np.errstate(all="ignore"):
+        sums = np.add.reduceat(np.where(present, values, 0), starts, axis=1)
+        means = sums / np.add.reduceat(present, starts, axis=1,
+                                       dtype=np.int64)
+    return _mean_heights(means, smin, smax, nchars)
+
+
+def _mean_heights(means, smin, smax, nchars):
+    """Scale `means` from between `smin` and `smax` to heights from 0 to
+    `nchars` - 1, with -1 for missing means."""
+    with np.errstate(all="ignore"):
+        # A constant series has no range to normalize by, so draw it at the
+        # bottom
+        heights = (means - smin) / np.subtract(smax, smin, dtype=float) \
+            * (nchars - 1)
+    heights = np.rint(np.where(np.isfinite(heights), heights, 0)).astype(int)
+    return np.where(np.isnan(means), -1, heights)
+
+
+def _join_rows(glyphs):
+    """Join each row of a 2-D array of characters into a string."""
+    if glyphs.shape[1] == 0:
+        return [""] * glyphs.shape[0]
+    glyphs = np.ascontiguousarray(glyphs, dtype="<U1")
+    return glyphs.view(f"<U{glyphs.shape[1]}")[:, 0].tolist()
+
 
-    plottypes = {
-        "bar":   "▁▂▃▄▅▆▇█",
-        "line":   "⎽⎼─⎻⎺",
-        "shade": "░▒▓█"
-    }
-    missing = "\u00A0"  # Character to use when data is missing
+_PLOTTYPES = {
+    "bar":   "▁▂▃▄▅▆▇█",
+    "line":   "⎽⎼─⎻⎺",
+    "shade": "░▒▓█"
+}
+_MISSING = "\u00A0"  # Character to use when data is missing
 
+
+def _plot_chars(plottype):
     try:
-        chars = plottypes[plottype]
+        return _PLOTTYPES[plottype]
     except KeyError:
-        print("Allowed plot types: " + ", ".join(plottypes.keys()))
+        raise ValueError("Allowed plot types: " + ", ".join(_PLOTTYPES))
+
+
+def _plot_values(series):
+    """Convert `series` to a NumPy array to plot, with datetimes as floats
+    (NaN for NaT), or return None if it is not numeric."""
+    from pandas.api.types import is_numeric_dtype, is_datetime64_any_dtype
 
-    # Convert to proper type
     if is_datetime64_any_dtype(series):
-        series = np.array([np.nan if np.isnat(x) else int(x)
-                           for x in np.array(series, dtype=np.datetime64)])
+        stamps = np.asarray(series, dtype="datetime64[ns]")
+        values = stamps.view("int64").astype(float)
+        values[np.isnat(stamps)] = np.nan
     else:
-        series = np.array(series)
+        values = np.asarray(series)
+
+    return values if is_numeric_dtype(values) else None
+
+
+def sparkline(series, width=10, plottype="bar", hist=False):
+    """Generate a basic sparkline graph, consisting of `width` bars,
+    of an iterable of numeric data. Each bar represents the mean of
+    that fraction of the data. Allowed `plottype`s are "bar", "line",
+    and "shade". If `hist` is true, plot a histogram of the data in
+    `width` bins. To draw many sparklines at once, see `sparkline_many`."""
+    if len(series) == 0:
+        return ""
+
+    chars = _plot_chars(plottype)
+    series = _plot_values(series)
 
     # If not numeric, there's nothing to plot
-    if not is_numeric_dtype(series):
+    if series is None:
         return " " * width
 
     smin = np.nanmin(series)
     smax = np.nanmax(series)
-    graph = ""
 
     if hist:
 
         # Drop NaNs, as they will not count anyway
         series = series[~np.isnan(series)]
-
-        # If we have fewer levels than bins, just use a bin for each level
-        width = min(width, len(np.unique(series)))
-
-        # Since we do strict less-than below, if the highest bin edge
-        # were the max of the series, the max of the seires would not
-        # be counted. So we make the highest bin edge infinity.
-        bins = np.linspace(smin, smax, width, endpoint=False)
-        bins = np.append(bins, np.inf)
-
-        # Divide into bins
-        levels = [np.sum((series >= bmin) & (series < bmax))
-                  for bmin, bmax in zip(bins, bins[1:])]
-
-        for level in levels:
-            level = level / max(levels) * (len(chars) - 1)
-            graph += chars[int(round(level))]
+        return _hist_graph(_hist_levels(series, smin, smax, width), chars)
 
     else:
 
         # If we have fewer rows than bars, just use a bar for each row
         width = min(width, series.shape[0])
 
-        # chunk into {width} chunks
-        chunk_indices = np.linspace(0, series.shape[0], width+1)
-        chunks = map(lambda tup: np.nanmean(series[int(tup[0]):int(tup[1])]),
-                     zip(chunk_indices, chunk_indices[1:]))
+        table = np.array(list(chars + _MISSING))
+        heights = _bar_heights(series[np.newaxis], smin, smax, width,
+                               len(chars))
+        return _join_rows(table[heights])[0]
+
+
+def _sparklines(values, width, chars, hist):
+    """Draw a sparkline of each row of the 2-D numeric array `values`."""
+    if values.shape[1] == 0 or width == 0:
+        return [""] * values.shape[0]
 
-        for i in chunks:
-            # Normalize to be between 0 and len(chars)
-            try:
-                level = (i - smin) / (smax - smin) * (len(chars) - 1)
-            except FloatingPointError:
-                level = 0
+    smin = np.nanmin(values, axis=1)
+    smax = np.nanmax(values, axis=1)
 
-            graph += missing if np.isnan(level) else chars[int(round(level))]
+    if hist:
+        smin = smin.astype(float)
+        smax = smax.astype(float)
+        levels, widths = _hist_levels_many(values, smin, smax, width)
+
+        # Edges can't be compared row-wise where the range is not finite,
+        # so those rows are binned one at a time
+        for i in np.flatnonzero(~np.isfinite(smax - smin) & (widths > 0)):
+            row = values[i][~np.isnan(values[i])]
+            hist_levels = _hist_levels(row, smin[i], smax[i], width)
+            widths[i] = len(hist_levels)
+            levels[i] = 0
+            levels[i, :widths[i]] = hist_levels
+
+        with np.errstate(all="ignore"):
+            heights = np.rint(levels / levels.max(axis=1, keepdims=True)
+                              * (len(chars) - 1))
+        heights = np.where(widths[:, np.newaxis] > 0, heights, 0).astype(int)
+
+        return [line[:w] for line, w in
+                zip(_join_rows(np.array(list(chars))[heights]), widths)]
+
+    else:
 
-    return graph
+        width = min(width, values.shape[1])
+        table = np.array(list(chars + _MISSING))
+        heights = _bar_heights(values, smin[:, np.newaxis],
+                               smax[:, np.newaxis], width, len(chars))
+        return _join_rows(table[heights])
+
+
+def sparkline_many(data, width=10, plottype="bar", hist=False):
+    """Generate a sparkline, exactly as `sparkline` would draw it, of each
+    row of a 2-D array, or each column of a data frame, binning all of them
+    together. Return a list of strings for an array, or a series indexed by
+    column for a data frame. For example:
+
+        sparkline_many(np.random.randn(1000, 60), width=20, hist=True)
+
+    will give a list of 1000 histograms."""
+    chars = _plot_chars(plottype)
+
+    if not isinstance(data, DataFrame):
+        data = np.asarray(data)
+        if data.ndim != 2:
+            raise ValueError("Expected a 2-D array or a data frame")
+        values = _plot_values(data)
+        if values is None:
+            return [" " * width if len(row) else "" for row in data]
+        return _sparklines(values, width, chars, hist)
+
+    # Columns are drawn together with others of the same type, so that
+    # each is summed in its own type as `sparkline` would
+    lines = [" " * width if len(data) else ""] * data.shape[1]
+    groups = {}
+    for i in range(data.shape[1]):
+        values = _plot_values(data.iloc[:, i])
+        if values is not None:
+            groups.setdefault(values.dtype, []).append((i, values))
+
+    for group in groups.values():
+        positions, columns = zip(*group)
+        for i, line in zip(positions, _sparklines(np.stack(columns), width,
+                                                  chars, hist)):
+            lines[i] = line
+
+    return Series(lines, index=data.columns, dtype=object)
+
+
+class SparklineBuffer:
+    """A sparkline of a live metric, which is updated as values arrive and
+    redrawn in time proportional to its width, without keeping the values
+    themselves. For example, to show the last minute of a metric in a status
+    line refreshed every second:
+
+        line = SparklineBuffer(width=60)
+        while True:
+            line.update(read_metric())
+            print(line, end="\r")
+            line.tick()
+            time.sleep(1)
+
+    Each of the `width` bars is the mean of a bucket of values. A new bucket
+    is started every `size` values, or on calling `tick()` if `size` is None,
+    and the oldest is then dropped. As with `sparkline`, bars are scaled to
+    the smallest and largest values in the buckets shown, and a bucket with
+    no values is left blank. Allowed `plottype`s are "bar", "line", and
+    "shade".
+
+    If `hist` is true, draw instead a histogram of all the values so far,
+    in the bins between the given `edges`, an increasing sequence with one
+    more item than there are bins. Values outside them are counted in the
+    first or last bin."""
+
+    def __init__(self, width=10, size=1, plottype="bar", hist=False,
+                 edges=None):
+        self.chars = _plot_chars(plottype)
+        self.size = size
+        self.hist = hist
+
+        if hist:
+            if edges is None:
+                raise ValueError("A histogram needs fixed bin edges")
+            self.edges = np.asarray(edges, dtype=float)
+            self.width = len(self.edges) - 1
+        else:
+            self.width = width
+
+        self.clear()
+
+    def clear(self):
+        """Forget all values."""
+        if self.hist:
+            self._counts = np.zeros(self.width, dtype=np.int64)
+        else:
+            self._sums = np.zeros(self.width)
+            self._counts = np.zeros(self.width, dtype=np.int64)
+            self._mins = np.full(self.width, np.nan)
+            self._maxes = np.full(self.width, np.nan)
+
+        self._head = 0      # Ring position of the current bucket
+        self._buckets = 0   # Buckets started, including the current one
+        self._filled = 0    # Values, missing or not, in the current bucket
+
+    def tick(self):
+        """Start a new bucket, dropping the oldest."""
+        self._head = (self._head + 1) % self.width
+        self._buckets = max(self._buckets, 1) + 1
+        self._filled = 0
+
+        if not self.hist:
+            self._sums[self._head] = 0
+            self._counts[self._head] = 0
+            self._mins[self._head] = np.nan
+            self._maxes[self._head] = np.nan
+
+        return self
+
+    def update(self, values):
+        """Add a value, or an iterable of values, to the sparkline."""
+        values = np.asarray(values, dtype=float).ravel()
+        if self.width == 0 or len(values) == 0:
+            return self
+
+        if self.hist:
+            bins = np.searchsorted(self.edges, values[~np.isnan(values)],
+                                   side="right") - 1
+            self._counts += np.bincount(np.clip(bins, 0, self.width - 1),
+                                        minlength=self.width)
+            return self
+
+        self._buckets = max(self._buckets, 1)
+
+        if not self.size:
+            self._add(values)
+            return self
+
+        # Fill the current bucket
+        if self._filled == self.size:
+            self.tick()
+        space = self.size - self._filled
+        self._add(values[:space])
+        self._filled += len(values[:space])
+        values = values[space:]
+
+        # Then put the rest in new buckets, of which only the last `width`
+        # can be shown
+        needed = -(-len(values) // self.size)
+        skip = max(needed - self.width, 0)
+        self._buckets += skip
+        self._head = (self._head + skip) % self.width
+        for start in range(skip * self.size, len(values), self.size):
+            self.tick()
+            self._add(values[start:start + self.size])
+            self._filled = len(values[start:start + self.size])
+
+        return self
+
+    def _add(self, values):
+        """Add values to the current bucket."""
+        present = ~np.isnan(values)
+        head = self._head
+        self._sums[head] += np.where(present, values, 0).sum()
+        self._counts[head] += np.count_nonzero(present)
+        if present.any():
+            self._mins[head] = np.fmin(self._mins[head], np.nanmin(values))
+            self._maxes[head] = np.fmax(self._maxes[head], np.nanmax(values))
+
+    def render(self):
+        """Draw the sparkline."""
+        if self.hist:
+            if not self._counts.any():
+                return ""
+            return _hist_graph(self._counts, self.chars)
+
+        if self._buckets == 0:
+            return ""
+
+        # Buckets in order from oldest to newest
+        shown = min(self._buckets, self.width)
+        order = (self._head - np.arange(shown)[::-1]) % self.width
+
+        with np.errstate(all="ignore"):
+            means = self._sums[order] / self._counts[order]
+        heights = _mean_heights(means, np.fmin.reduce(self._mins[order]),
+                                np.fmax.reduce(self._maxes[order]),
+                                len(self.chars))
+        return "".join(np.array(list(self.chars + _MISSING))[heights])
+
+    def __str__(self):
+        return self.render()
 
 
 def _sparkline_series(self, *args, **kwargs):
@@ -131,37 +448,89 @@ def _sparkline_dataframe(self, col, *args, **kwargs):
     return sparkline(self[col], *args, **kwargs)
 
 
-def _to_markdown(df):
-    """Format list of objects as row in markdown table"""
-    df = df.astype(str)
+def _write_markdown(file, header, cells, caption):
+    """Write a table in GitHub-flavored markdown."""
+    if caption:
+        file.write(caption + "\n\n")
 
-    # List of character widths of each column
-    widths = [max(len(col), *(len(cell) for cell in df[col]))
-              for col in df.columns]
+    # Pad each column to its widest cell
+    widths = [max(len(title), max(map(len, column), default=0))
+              for title, column in zip(header, cells)]
+    header = [title.ljust(w) for title, w in zip(header, widths)]
+    cells = [[cell.ljust(w) for cell in column]
+             for column, w in zip(cells, widths)]
 
-    # Header row
-    table = " ".join(["| {:{w}}".format(str(cell), w=w)
-                      for cell, w in zip(df.columns, widths)]) + " |\n"
+    file.write("| " + " | ".join(header) + " |\n")
 
     # Separator row. GitHub markdown calls for separators
     # that are only dashes and pipes, no plus signs:
     # <https://github.github.com/gfm/#tables-extension->
-    table += "|" + "|".join(["-"*(w+2) for w in widths]) + "|\n"
+    file.write("|" + "|".join("-"*(w+2) for w in widths) + "|\n")
+
+    file.writelines("| " + " | ".join(row) + " |\n" for row in zip(*cells))
+
+
+def _write_html(file, header, cells, caption):
+    """Write a table in HTML."""
+    from html import escape
+
+    file.write("<table>\n")
+    if caption:
+        file.write(f"<caption>{escape(caption)}</caption>\n")
 
-    # Body rows
-    table += "\n".join([" ".join(["| {:{w}}".format(str(cell), w=w)
-                        for cell, w in zip(row, widths)]) + " |"
-                        for _, row in df.iterrows()])
+    file.write("<thead>\n<tr>" +
+               "".join(f"<th>{escape(title)}</th>" for title in header) +
+               "</tr>\n</thead>\n<tbody>\n")
 
-    return table
+    cells = [[escape(cell) for cell in column] for column in cells]
+    file.writelines("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) +
+                    "</tr>\n" for row in zip(*cells))
 
+    file.write("</tbody>\n</table>\n")
 
-def data_dictionary(self, **kwargs):
+
+def _write_csv(file, header, cells, caption):
+    """Write a table as CSV. There is nowhere to put a caption."""
+    import csv
+
+    writer = csv.writer(file, lineterminator="\n")
+    writer.writerow(header)
+    writer.writerows(zip(*cells))
+
+
+_TABLE_FORMATS = {
+    "markdown": _write_markdown,
+    "html": _write_html,
+    "csv": _write_csv,
+}
+
+
+def _write_table(df, file, format="markdown", caption=None):
+    """Write a data frame to the file-like object `file` as a table in the
+    given `format` ("markdown", "html", or "csv"). Each column is formatted
+    once, and rows are written one at a time."""
+    try:
+        writer = _TABLE_FORMATS[format]
+    except KeyError:
+        raise ValueError("Allowed formats: " + ", ".join(_TABLE_FORMATS))
+
+    header = [str(col) for col in df.columns]
+    # astype(str) can leave missing values be, so map each cell
+    cells = [df.iloc[:, i].map(str).tolist() for i in range(df.shape[1])]
+    writer(file, header, cells, caption)
+
+
+def data_dictionary(self, n_jobs=None, cache=None, file=None,
+                    format="markdown", **kwargs):
     """Generate a data dictionary for a given data frame in GitHub-flavored
     markdown, with a description column to be filled in by hand. To write out:
 
         with open("datadict.md", "w")  as outfile:
-            print(df.data_dictionary(), file=outfile)
+            df.data_dictionary(file=outfile)
+
+    which writes the table a row at a time rather than returning it as a
+    string. Pass `format="html"` or `format="csv"` for those formats instead
+    (CSV has no caption).
 
     You can add any aggregation columns with the syntax Title=Function. Any
     function that can be passed to pandas.DataFrame.agg can be passed here.
@@ -170,16 +539,24 @@ def data_dictionary(self, **kwargs):
         df.data_dictionary(Mean=np.mean, Median="median", Description=False)
 
     will create mean and median columns, and a blank "Description" column to be
-    filled in manually by the user."""
-    summary = self.summary(**kwargs).reset_index()
+    filled in manually by the user. `n_jobs` and `cache` are passed on to
+    `summary`."""
+    summary = self.summary(n_jobs=n_jobs, cache=cache, **kwargs)
 
-    missing_total = self.isna().sum().sum()
+    missing_total = summary.attrs["missing"]
     s = "" if missing_total == 1 else "s"
     caption = f"Data frame, {self.shape[0]:,} rows with " +\
               f"{missing_total:,} missing value{s}:"
 
-    # The row of empty strings will be turned into a separator line
-    return caption + "\n\n" + _to_markdown(summary)
+    if file is not None:
+        _write_table(summary.reset_index(), file, format, caption)
+        return
+
+    from io import StringIO
+
+    out = StringIO()
+    _write_table(summary.reset_index(), out, format, caption)
+    return out.getvalue().rstrip("\n")
 
 
 DataFrame.data_dictionary = data_dictionary
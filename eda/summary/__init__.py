@@ -1,7 +1,13 @@
 from .summary import summary
+from .summary import summarize_path
 from .summary import missing
 from .summary import missing_by
 from .summary import missing_map
+from .summary import missing_patterns
 from .summary import misordered
+from .rules import RuleSet
 from .summary import benford
 from .summary import benford_plot
+from .sketch import BenfordCounter
+from .sketch import approx_quantile
+from .cache import SummaryCache
@@ -0,0 +1,165 @@
+"""
+File: cache.py
+Author: Alex Klapheke
+Email: alexklapheke@gmail.com
+Github: https://github.com/alexklapheke
+Description: Caching of column summaries
+
+Copyright © 2020 Alex Klapheke
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+import numpy as np
+
+
+def _fingerprint(col):
+    """Hash a column's dtype, length, and contents. Plain NumPy columns are
+    hashed straight from their buffer; others, whose buffers may only hold
+    pointers, from pandas' hashes of their values."""
+    from pandas.util import hash_pandas_object
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{col.dtype}:{len(col)}:".encode())
+
+    if isinstance(col.dtype, np.dtype) and col.dtype.kind in "biufcmM":
+        digest.update(np.ascontiguousarray(col.to_numpy()).view(np.uint8))
+    else:
+        digest.update(hash_pandas_object(col, index=False).to_numpy())
+
+    return digest.hexdigest()
+
+
+def _stat_key(stat):
+    """Name an aggregation stably across sessions, or return None if it
+    cannot be (e.g. a lambda), in which case its results are not cached."""
+    from .sketch import _Approximation
+
+    if isinstance(stat, (str, _Approximation)):
+        return repr(stat)
+
+    name = getattr(stat, "__qualname__", None)
+    if name is None or "<" in name:
+        return None
+    return f"{getattr(stat, '__module__', '')}.{name}"
+
+
+class SummaryCache:
+    """A cache of the column profiles behind `summary` and
+    `data_dictionary`, so that when they are run again on a data frame in
+    which only a few columns have changed, only those columns are profiled
+    again:
+
+        cache = SummaryCache()
+        df.summary(cache=cache)
+        df["x"] = df["x"].fillna(0)
+        df.summary(cache=cache)  # Only profiles x
+
+    Columns are looked up by their dtype, length, and a hash of their
+    contents (not their names), along with the aggregations asked for, so
+    hashing a column costs a single pass over its values. Aggregations that
+    cannot be named reliably, such as lambdas, disable caching for that
+    call. Options:
+
+        maxsize:  The number of profiles to keep in memory, evicting the
+                  least recently used first. None means no limit.
+        path:     A directory in which to also store profiles on disk, so
+                  that they survive the session. It is created if need be,
+                  and is not limited in size.
+
+    The `hits` and `misses` attributes count lookups."""
+
+    def __init__(self, maxsize=1024, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._profiles = OrderedDict()
+
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def key(self, col, stats=()):
+        """Return the key of a column's profile with `stats`, or None if
+        it cannot be cached."""
+        stat_keys = [_stat_key(stat) for stat in stats]
+        if None in stat_keys:
+            return None
+
+        try:
+            fingerprint = _fingerprint(col)
+        except TypeError:
+            # Values pandas cannot hash, such as lists
+            return None
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(fingerprint.encode())
+        for stat_key in stat_keys:
+            digest.update(b"\0" + stat_key.encode())
+        return digest.hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, key + ".pkl")
+
+    def get(self, key):
+        """Return the profile stored under `key`, or None."""
+        if key in self._profiles:
+            self._profiles.move_to_end(key)
+            self.hits += 1
+            return self._profiles[key]
+
+        if self.path is not None and os.path.exists(self._file(key)):
+            with open(self._file(key), "rb") as infile:
+                profile = pickle.load(infile)
+            self._remember(key, profile)
+            self.hits += 1
+            return profile
+
+        self.misses += 1
+        return None
+
+    def put(self, key, profile):
+        """Store a profile under `key`."""
+        self._remember(key, profile)
+
+        if self.path is not None:
+            # Write to a temporary file first so that a reader never sees a
+            # partial profile
+            temp = self._file(key) + f".{os.getpid()}.tmp"
+            with open(temp, "wb") as outfile:
+                pickle.dump(profile, outfile)
+            os.replace(temp, self._file(key))
+
+    def _remember(self, key, profile):
+        self._profiles[key] = profile
+        self._profiles.move_to_end(key)
+        while self.maxsize is not None and len(self._profiles) > self.maxsize:
+            self._profiles.popitem(last=False)
+
+    def clear(self):
+        """Empty the cache in memory (but not on disk)."""
+        self._profiles.clear()
@@ -0,0 +1,184 @@
+"""
+File: rules.py
+Author: Alex Klapheke
+Email: alexklapheke@gmail.com
+Github: https://github.com/alexklapheke
+Description: Batched validation of data quality rules
+
+Copyright © 2020 Alex Klapheke
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import operator
+
+import numpy as np
+from pandas import DataFrame
+
+
+def _misordered_mask(arrays, ascending=True, allow_equal=True):
+    """Return which rows of `arrays` (NumPy arrays or Series of the same
+    frame) are in the wrong order."""
+    if ascending:
+        op = operator.gt if allow_equal else operator.ge
+    else:
+        op = operator.lt if allow_equal else operator.le
+
+    return np.logical_or.reduce([_compare(op, a, b)
+                                 for a, b in zip(arrays, arrays[1:])])
+
+
+def _compare(op, a, b):
+    """Compare two columns, or a column and a bound, where missing values are
+    never in violation."""
+    out = op(a, b)
+    if isinstance(out, np.ndarray):
+        return out
+    return out.fillna(False).to_numpy(dtype=bool)
+
+
+def _column(df, col):
+    """Return a column as a NumPy array if it holds plain numbers (with NaN
+    where it is missing), and otherwise as a Series, which pandas compares
+    with missing values, such as None and NaT, and bounds, such as dates
+    given as strings, handled."""
+    from pandas.api.types import is_numeric_dtype
+
+    series = df[col]
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biuf":
+        return series.to_numpy()
+    elif is_numeric_dtype(series.dtype) and series.dtype.kind != "b":
+        return series.to_numpy(dtype=float, na_value=np.nan)
+    else:
+        return series
+
+
+class _Order:
+
+    def __init__(self, cols, ascending, allow_equal, name):
+        if len(cols) < 2:
+            raise ValueError("An order rule needs at least two columns.")
+        self.cols = cols
+        self.ascending = ascending
+        self.allow_equal = allow_equal
+
+        sign = ("≤" if allow_equal else "<") if ascending \
+            else ("≥" if allow_equal else ">")
+        self.name = name or f" {sign} ".join(map(str, cols))
+
+    def mask(self, column):
+        return _misordered_mask([column(col) for col in self.cols],
+                                self.ascending, self.allow_equal)
+
+
+class _Range:
+
+    def __init__(self, col, lower, upper, inclusive, name):
+        self.col = col
+        self.lower = lower
+        self.upper = upper
+        self.inclusive = inclusive
+
+        sign = "≤" if inclusive else "<"
+        self.name = name or " ".join(
+            ([f"{lower} {sign}"] if lower is not None else []) + [str(col)] +
+            ([f"{sign} {upper}"] if upper is not None else []))
+
+    def mask(self, column):
+        values = column(self.col)
+        mask = np.zeros(len(values), dtype=bool)
+
+        below = operator.lt if self.inclusive else operator.le
+        above = operator.gt if self.inclusive else operator.ge
+        if self.lower is not None:
+            mask |= _compare(below, values, self.lower)
+        if self.upper is not None:
+            mask |= _compare(above, values, self.upper)
+        return mask
+
+
+class RuleSet:
+    """A set of data quality rules to check a data frame, or a file of data
+    too large to load at once, against in a single pass over its columns.
+    Rules are added with `order` and `range`, which can be chained:
+
+        rules = RuleSet().\\
+            order("start", "middle", "end").\\
+            range("age", 0, 120).\\
+            range("price", lower=0, inclusive=False)
+        rules.check(df)
+
+    Checking returns a data frame with a row for each rule, giving the
+    number of rows that violate it and their index labels. Missing values
+    never violate a rule."""
+
+    def __init__(self):
+        self.rules = []
+
+    def order(self, *cols, ascending=True, allow_equal=True, name=None):
+        """Require the values in `cols` to be in order, as in
+        `misordered`."""
+        self.rules.append(_Order(cols, ascending, allow_equal, name))
+        return self
+
+    def range(self, col, lower=None, upper=None, inclusive=True, name=None):
+        """Require the values in `col` to be between `lower` and `upper`,
+        either of which can be None to leave that side open."""
+        self.rules.append(_Range(col, lower, upper, inclusive, name))
+        return self
+
+    def _positions(self, df):
+        """Find the positions of the rows violating each rule, fetching each
+        column's array only once."""
+        arrays = {}
+
+        def column(col):
+            if col not in arrays:
+                arrays[col] = _column(df, col)
+            return arrays[col]
+
+        return [np.flatnonzero(rule.mask(column)) for rule in self.rules]
+
+    def _result(self, rows):
+        return DataFrame({
+            "Violations": [len(labels) for labels in rows],
+            "Rows": rows,
+        }, index=[rule.name for rule in self.rules]).rename_axis("Rule")
+
+    def check(self, df):
+        """Check a data frame against the rules."""
+        return self._result([df.index[positions].to_numpy()
+                             for positions in self._positions(df)])
+
+    def check_path(self, path, chunksize=100_000, read_kwargs=None):
+        """Check a CSV or Parquet file against the rules, reading
+        `chunksize` rows at a time. Any `read_kwargs` are passed on as in
+        `summarize_path`. Rows are labeled as pandas.read_csv labels them
+        (by their position in the file, unless told otherwise)."""
+        from .sketch import _read_chunks
+
+        rows = [[] for rule in self.rules]
+        for chunk in _read_chunks(path, chunksize, read_kwargs):
+            for labels, positions in zip(rows, self._positions(chunk)):
+                labels.append(chunk.index[positions].to_numpy())
+
+        return self._result([np.concatenate(labels) if labels
+                             else np.zeros(0, dtype=np.int64)
+                             for labels in rows])
@@ -0,0 +1,794 @@
+"""
+File: sketch.py
+Author: Alex Klapheke
+Email: alexklapheke@gmail.com
+Github: https://github.com/alexklapheke
+Description: Mergeable column summaries for data read in chunks
+
+Copyright © 2020 Alex Klapheke
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import copy
+import numpy as np
+
+
+def _read_chunks(path, chunksize, read_kwargs=None, text=None):
+    """Read a CSV or Parquet file `chunksize` rows at a time, passing any
+    `read_kwargs` on to pandas.read_csv or to
+    pyarrow.parquet.ParquetFile.iter_batches. If `text` lists columns of a
+    CSV file, only those are read, as text."""
+    import os
+
+    read_kwargs = read_kwargs or {}
+    if os.path.splitext(path)[1].lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+
+        offset = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize,
+                                                       **read_kwargs):
+            chunk = batch.to_pandas()
+            chunk.index += offset
+            offset += len(chunk)
+            yield chunk
+    else:
+        import pandas as pd
+
+        if text:
+            read_kwargs = _text_kwargs(read_kwargs, text)
+        yield from pd.read_csv(path, chunksize=chunksize, **read_kwargs)
+
+
+def _text_kwargs(read_kwargs, text):
+    """Adapt arguments to pandas.read_csv to read only the columns in `text`,
+    as text. Arguments naming other columns would make read_csv raise, so
+    those about parsing and indexing are dropped, and those keyed by column
+    are cut down to the columns in `text`."""
+    read_kwargs = {key: value for key, value in read_kwargs.items()
+                   if key not in ("usecols", "index_col", "parse_dates",
+                                  "date_format", "dtype")}
+    for key in ("converters", "na_values"):
+        if isinstance(read_kwargs.get(key), dict):
+            read_kwargs[key] = {col: value
+                                for col, value in read_kwargs[key].items()
+                                if col in text}
+
+    # Converted columns hold whatever their converters return, as they
+    # would if read whole
+    converters = read_kwargs.get("converters") or {}
+    read_kwargs["usecols"] = text
+    read_kwargs["dtype"] = {col: str for col in text if col not in converters}
+    return read_kwargs
+
+
+def _present(col, mask):
+    """Return the values of a numeric column where `mask` is false, as a
+    NumPy array of the column's own type."""
+    if isinstance(col.dtype, np.dtype):
+        return col.to_numpy()[~mask]
+    else:
+        return col[~mask].to_numpy()
+
+
+def _first_two_digits(values):
+    """Return the first two significant digits, as a number from 10 to 99,
+    of each of `values` that is finite and not zero."""
+    values = np.abs(values[np.isfinite(values) & (values != 0)])
+
+    # Scale into [10, 100), multiplying or dividing by an exact power of
+    # ten, since e.g. 0.3 / 0.1 comes out just under 3. Rounding then
+    # absorbs the error left in the last place. Subnormal numbers need a
+    # first step, as the power of ten they need overflows.
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        exponents = np.floor(np.log10(values)) - 1
+        tiny = exponents < -300
+        values = np.where(tiny, values * 1e300, values)
+        exponents = np.where(tiny, exponents + 300, exponents)
+        scaled = np.where(exponents < 0, values * 10.0 ** -exponents,
+                          values / 10.0 ** exponents)
+        scaled = np.round(scaled, 9)
+
+    # log10 can be off by one near powers of ten
+    scaled = np.where(scaled >= 100, scaled / 10, scaled)
+    scaled = np.where(scaled < 10, scaled * 10, scaled)
+
+    return np.floor(scaled[np.isfinite(scaled)]).astype(np.int64)
+
+
+class BenfordCounter:
+    """A count of the first two significant digits of a set of numbers,
+    from which to test their conformity to Benford's Law. Zeros and
+    missing or infinite values are left out. Counters of different parts of
+    a dataset can be merged:
+
+        counter = BenfordCounter()
+        for chunk in chunks:
+            counter.update(chunk["amount"])
+        counter.proportions("second")
+
+    The attribute `counts` holds the counts, indexed by the two digits
+    (10 through 99)."""
+
+    # The tests `proportions` can give, and the digits each covers
+    tests = {
+        "first": np.arange(1, 10),
+        "first_two": np.arange(10, 100),
+        "second": np.arange(0, 10),
+    }
+
+    def __init__(self):
+        self.counts = np.zeros(100, dtype=np.int64)
+
+    def update(self, values):
+        """Count the digits of an iterable of numbers."""
+        values = np.asarray(values, dtype=float).ravel()
+        self.counts += np.bincount(_first_two_digits(values), minlength=100)
+        return self
+
+    def merge(self, other):
+        """Add the counts of another counter to this one."""
+        self.counts += other.counts
+        return self
+
+    def _digit_counts(self, test):
+        if test == "first":
+            return self.counts[10:].reshape(9, 10).sum(axis=1)
+        elif test == "first_two":
+            return self.counts[10:]
+        elif test == "second":
+            return self.counts[10:].reshape(9, 10).sum(axis=0)
+        else:
+            raise ValueError("Allowed tests: " + ", ".join(self.tests))
+
+    def proportions(self, test="first"):
+        """Return the proportion of the numbers with each digit (see
+        `tests`), or an empty list if there are none."""
+        counts = self._digit_counts(test)
+        total = counts.sum()
+        return list(counts / total) if total else []
+
+
+def _benford_expected(test="first"):
+    """The proportions of each digit that Benford's Law predicts."""
+    if test == "second":
+        firsts = np.arange(1, 10)[:, np.newaxis]
+        return np.log10(1 + 1 / (10 * firsts + np.arange(10))).sum(axis=0)
+    return np.log10(1 + 1 / BenfordCounter.tests[test])
+
+
+class _Histogram:
+    """A histogram of `size` bins whose width is a power of two and whose
+    edges are multiples of it. When new data fall outside the bins,
+    neighboring bins are merged, doubling their width, until they fit, so
+    two histograms can always be merged exactly by bringing them to the
+    same bins."""
+
+    def __init__(self, size=1024):
+        self.size = size
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.start = None
+        self.width = None
+        self.lo = np.inf
+        self.hi = -np.inf
+
+    def _fit(self, lo, hi, width):
+        """Return the first edge and width of the narrowest bins at least
+        `width` wide that cover `lo` to `hi`."""
+        while True:
+            start = np.floor(lo / width) * width
+            if hi < start + self.size * width:
+                return start, width
+            width *= 2
+
+    def _rebin(self, start, width):
+        if start == self.start and width == self.width:
+            return
+
+        occupied = np.flatnonzero(self.counts)
+        edges = self.start + self.width * occupied
+        bins = np.floor((edges - start) / width).astype(np.int64)
+        self.counts = np.bincount(bins, weights=self.counts[occupied],
+                                  minlength=self.size).astype(np.int64)
+        self.start, self.width = start, width
+
+    def update(self, values):
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+
+        lo, hi = min(self.lo, values.min()), max(self.hi, values.max())
+        if self.width is None:
+            span = (hi - lo) or abs(lo) or 1.0
+            width = max(2.0 ** np.ceil(np.log2(span / self.size)),
+                        np.finfo(float).tiny)
+            self.start, self.width = self._fit(lo, hi, width)
+        else:
+            self._rebin(*self._fit(lo, hi, self.width))
+        self.lo, self.hi = lo, hi
+
+        bins = ((values - self.start) // self.width).astype(np.int64)
+        self.counts += np.bincount(np.clip(bins, 0, self.size - 1),
+                                   minlength=self.size)
+
+    def merge(self, other):
+        if other.width is None:
+            return self
+        elif self.width is None:
+            vars(self).update(copy.deepcopy(vars(other)))
+            return self
+
+        lo, hi = min(self.lo, other.lo), max(self.hi, other.hi)
+        start, width = self._fit(lo, hi, max(self.width, other.width))
+        self._rebin(start, width)
+        other = copy.deepcopy(other)
+        other._rebin(start, width)
+
+        self.counts += other.counts
+        self.lo, self.hi = lo, hi
+        return self
+
+    def levels(self, smin, smax, width):
+        """Approximate the counts in `width` equal-width bins running from
+        `smin` to `smax`, splitting each bin here between them in
+        proportion to how much of it they cover."""
+        edges = np.append(np.linspace(smin, smax, width, endpoint=False),
+                          np.inf)
+        fine = np.clip(self.start + self.width * np.arange(self.size + 1),
+                       self.lo, self.hi)
+        cumulative = np.append(0, np.cumsum(self.counts))
+        return np.diff(np.interp(edges, fine, cumulative))
+
+
+class _KLL:
+    """A KLL quantile sketch (Karnin, Lang & Liberty, 2016), which keeps at
+    most about 3k values, where the values at level h stand for 2**h values
+    each. With the default k of 200, the rank of an estimated quantile is
+    typically within 1% of the number of values. Until the first compaction
+    it holds every value, and the quantiles are exact. Values are sorted
+    and compacted k at a time, so adding n of them costs O(n log k)."""
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.count = 0
+        self.levels = [np.zeros(0)]
+        self.random = np.random.RandomState(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _add(self, level, values):
+        while len(self.levels) <= level:
+            self.levels.append(np.zeros(0))
+        self.levels[level] = np.concatenate([self.levels[level], values])
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                # Keep every other value in sorted order, starting at random,
+                # leaving one behind if there is an odd number
+                items = np.sort(self.levels[level])
+                odd = len(items) % 2
+                self.levels[level] = items[:odd]
+                self._add(level + 1, items[odd + self.random.randint(2)::2])
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        missing = np.isnan(values)
+        if missing.any():
+            values = values[~missing]
+        self.count += values.size
+
+        # Feed the batch through the bottom level k values at a time, as if
+        # they had arrived one by one: each full piece is sorted and
+        # compacted on its own, so no sort is larger than k. The pieces of a
+        # level are compacted together, and what is kept moves up a level;
+        # whatever is left over stays at the level it reached.
+        piece = self.k + self.k % 2
+        level = 0
+        while values.size > piece:
+            whole = values.size - values.size % piece
+            self._add(level, values[whole:])
+            pieces = np.sort(values[:whole].reshape(-1, piece), axis=1)
+            odd = self.random.randint(2, size=(pieces.shape[0], 1)) == 1
+            values = np.where(odd, pieces[:, 1::2], pieces[:, ::2]).ravel()
+            level += 1
+
+        self._add(level, values)
+        self._compress()
+        return self
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            self._add(level, items)
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        elif len(self.levels) == 1:
+            return np.quantile(self.levels[0], q)
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(values)
+        ranks = np.cumsum(weights[order])
+        return values[order][min(np.searchsorted(ranks, q * ranks[-1]),
+                                 len(values) - 1)]
+
+
+class _HyperLogLog:
+    """A HyperLogLog distinct value counter (Flajolet et al., 2007) with
+    2**p registers, whose estimates have a relative standard error of about
+    1.04 / sqrt(2**p), or 1.6% for the default p of 12. Small counts are
+    estimated by linear counting, which is close to exact."""
+
+    def __init__(self, p=12):
+        self.p = p
+        self.registers = np.zeros(2 ** p, dtype=np.uint8)
+
+    def update(self, values):
+        from pandas.api.types import infer_dtype
+        from pandas.util import hash_array
+
+        values = np.asarray(values)
+        if values.size == 0:
+            return self
+
+        # Hash numbers by value, so that 1 and 1.0 (and 0.0 and -0.0) agree,
+        # even when they are held as objects
+        if values.dtype.kind in "biuf" or \
+                (values.dtype == object and
+                 infer_dtype(values, skipna=False) in
+                 ("boolean", "integer", "floating", "mixed-integer-float")):
+            values = values.astype(float) + 0.0
+        hashes = hash_array(values)
+
+        # The first p bits pick the register, and the rest give the rank:
+        # the position of their first 1 bit, which is 65 less the binary
+        # exponent frexp finds (or is capped, if there is none)
+        registers = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        _, exponents = np.frexp((hashes << np.uint64(self.p)).astype(float))
+        ranks = np.minimum(65 - exponents, 64 - self.p + 1)
+        np.maximum.at(self.registers, registers, ranks.astype(np.uint8))
+        return self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        harmonic = np.sum(2.0 ** -self.registers.astype(float))
+        estimate = alpha * m ** 2 / harmonic
+
+        empty = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and empty:
+            estimate = m * np.log(m / empty)
+        return estimate
+
+
+class _Approximation:
+    """An aggregation estimated from a mergeable sketch, which `summary`,
+    `summarize_path`, and `data_dictionary` accept like "benford". If
+    `numeric`, it only applies to numbers and datetimes."""
+
+    numeric = True
+
+    def sketch(self):
+        raise NotImplementedError
+
+    def result(self, sketch, dtype):
+        raise NotImplementedError
+
+    def estimate(self, values, dtype):
+        """Estimate the aggregation of an array of non-missing values (as
+        integer nanoseconds, for datetimes) from a column of `dtype`."""
+        return self.result(self.sketch().update(values), dtype)
+
+    def column(self, col):
+        """Estimate the aggregation of a column."""
+        mask = col.isna().to_numpy()
+        if col.dtype.kind == "M":
+            values = col.to_numpy(dtype="datetime64[ns]").view("int64")
+            values = values[~mask]
+        elif col.dtype.kind in "biuf":
+            values = _present(col, mask)
+        elif self.numeric:
+            return ""
+        else:
+            values = col[~mask].to_numpy()
+
+        return self.estimate(values, col.dtype)
+
+
+class _ApproxQuantile(_Approximation):
+
+    def __init__(self, q):
+        self.q = q
+
+    def __eq__(self, other):
+        return isinstance(other, _ApproxQuantile) and other.q == self.q
+
+    def __hash__(self):
+        return hash((_ApproxQuantile, self.q))
+
+    def __repr__(self):
+        return f"approx_quantile({self.q})"
+
+    def sketch(self):
+        return _KLL()
+
+    def result(self, sketch, dtype):
+        from pandas import Timestamp
+
+        value = sketch.quantile(self.q)
+        if dtype.kind == "M":
+            return Timestamp(int(round(value)), unit="ns",
+                             tz=getattr(dtype, "tz", None)) \
+                if sketch.count else Timestamp("NaT")
+        return np.float64(value)
+
+
+class _ApproxNunique(_Approximation):
+
+    numeric = False
+
+    def __eq__(self, other):
+        return isinstance(other, _ApproxNunique)
+
+    def __hash__(self):
+        return hash(_ApproxNunique)
+
+    def __repr__(self):
+        return "approx_nunique"
+
+    def sketch(self):
+        return _HyperLogLog()
+
+    def result(self, sketch, dtype):
+        return np.int64(round(sketch.count()))
+
+
+def approx_quantile(q):
+    """Return an aggregation for `summary` (and `summarize_path` and
+    `data_dictionary`) that estimates the `q`th quantile of each numeric or
+    datetime column with a KLL sketch, within about 1% in rank:
+
+        df.summary(P90=approx_quantile(0.9))
+
+    "approx_median" is short for approx_quantile(0.5). For columns of 200
+    values or fewer, the quantile is exact."""
+    return _ApproxQuantile(q)
+
+
+_APPROXIMATIONS = {
+    "approx_median": _ApproxQuantile(0.5),
+    "approx_nunique": _ApproxNunique(),
+}
+
+
+def _approximation(fun):
+    """Return the sketched aggregation `fun` names, if any."""
+    if isinstance(fun, _Approximation):
+        return fun
+    elif isinstance(fun, str):
+        return _APPROXIMATIONS.get(fun)
+    else:
+        return None
+
+
+class _ColumnSketch:
+    """A summary of one column that can be built up a chunk at a time and
+    merged with the summary of another part of the column: the number of
+    present and missing values, the extremes, and, for numbers and
+    datetimes, the moments, a histogram, the distinct values while there
+    are no more than `width` of them, and Benford digit counts, along with
+    the sketches for any approximate aggregations in `stats`."""
+
+    def __init__(self, width=10, stats=()):
+        self.width = width
+        self.stats = stats
+        self.sketches = {approx: approx.sketch()
+                         for approx in map(_approximation, stats) if approx}
+        self.dtype = None
+        self.mixed = False      # Whether parts disagreed on the dtype
+        self.missing = 0
+        self.count = 0
+        self.min = self.max = None
+        self.extremes = True    # Whether min and max could be computed
+        self.sum = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.histogram = _Histogram()
+        self.distinct = (np.zeros(0), np.zeros(0, dtype=np.int64))
+        self.benford = BenfordCounter()
+
+    @property
+    def native(self):
+        """Whether the column holds plain numbers, Booleans, or datetimes."""
+        return self.dtype is not None and self.dtype.kind in "biufM"
+
+    def update(self, col):
+        """Add a chunk of the column, as a pandas Series."""
+        return self.merge(_ColumnSketch._of(col, self.width, self.stats))
+
+    @classmethod
+    def _of(cls, col, width, stats):
+        from pandas.api.types import is_datetime64_any_dtype
+
+        sketch = cls(width, stats)
+        sketch.dtype = col.dtype
+        mask = col.isna().to_numpy()
+        sketch.missing = int(mask.sum())
+        sketch.count = len(col) - sketch.missing
+
+        if not sketch.native:
+            sketch.benford = None
+            present = col[~mask]
+            if present.size:
+                try:
+                    sketch.min, sketch.max = present.min(), present.max()
+                except (TypeError, ValueError):
+                    sketch.extremes = False
+            if "benford" in stats:
+                # As `benford` does, count anything that converts to numbers
+                try:
+                    sketch.benford = BenfordCounter().update(
+                        present.to_numpy())
+                except (TypeError, ValueError):
+                    pass
+            for approx in sketch.sketches:
+                if approx.numeric:
+                    sketch.sketches[approx] = None
+                else:
+                    sketch.sketches[approx].update(present.to_numpy())
+            return sketch
+
+        datetime = is_datetime64_any_dtype(col)
+        if datetime:
+            sketch.benford = None
+            values = col.to_numpy(dtype="datetime64[ns]")
+            values = values.view("int64")[~mask]
+        else:
+            values = _present(col, mask)
+
+        if values.size == 0:
+            return sketch
+
+        # Booleans keep their own extremes, as pandas gives them, but are
+        # otherwise counted as 0s and 1s
+        sketch.min, sketch.max = values.min(), values.max()
+        if values.dtype == bool:
+            values = values.astype(np.uint8)
+
+        floats = values.astype(float)
+        sketch.sum = 0 if datetime else values.sum()
+        sketch.mean = floats.mean()
+        sketch.m2 = np.sum((floats - sketch.mean) ** 2)
+        sketch.histogram.update(floats)
+
+        # Sorting a chunk of continuous data just to find it has many
+        # distinct values is wasteful, so look at a sample first
+        if len(np.unique(values[:4 * width])) > width:
+            sketch.distinct = None
+        else:
+            sketch.distinct = np.unique(values, return_counts=True)
+            if len(sketch.distinct[0]) > width:
+                sketch.distinct = None
+
+        if sketch.benford is not None:
+            sketch.benford.update(values)
+
+        for approx in sketch.sketches.values():
+            approx.update(values)
+
+        return sketch
+
+    def merge(self, other):
+        """Fold the summary of another part of the column into this one."""
+        if other.dtype is None:
+            return self
+        elif self.dtype is None:
+            vars(self).update(copy.deepcopy(vars(other)))
+            return self
+
+        compatible = self.native == other.native
+        dtype = _common_dtype(self.dtype, other.dtype,
+                              self.count == 0, other.count == 0)
+        if dtype is None:
+            # Read whole, the column would be text; see summarize_path
+            self.mixed = True
+            compatible = False
+            dtype = np.dtype(object)
+        self.dtype = dtype
+        self.mixed = self.mixed or other.mixed
+
+        if other.count:
+            self._merge_sketches(other, compatible)
+
+        if other.count and (self.count == 0 or compatible):
+            with np.errstate(over="ignore"):
+                self._merge_values(other)
+        elif other.count:
+            # Numbers or datetimes mixed with other things, such as
+            # Booleans with the objects read_csv makes of them alongside
+            # missing values
+            self._merge_extremes(other)
+            self.count += other.count
+
+        self.missing += other.missing
+        if self.benford is not None and other.benford is not None:
+            self.benford.merge(other.benford)
+        else:
+            self.benford = None
+
+        return self
+
+    def _merge_sketches(self, other, compatible):
+        for approx, sketch in other.sketches.items():
+            if self.count == 0:
+                self.sketches[approx] = copy.deepcopy(sketch)
+            elif self.sketches[approx] is None or sketch is None or \
+                    (approx.numeric and not compatible):
+                self.sketches[approx] = None
+            else:
+                self.sketches[approx].merge(sketch)
+
+    def _merge_extremes(self, other):
+        if self.count == 0:
+            self.min, self.max = other.min, other.max
+        elif self.extremes and other.extremes:
+            try:
+                self.min = min(self.min, other.min)
+                self.max = max(self.max, other.max)
+            except TypeError:
+                self.extremes = False
+        self.extremes = self.extremes and other.extremes
+
+    def _merge_values(self, other):
+        self._merge_extremes(other)
+
+        # Chan et al.'s update for combining means and sums of squares
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.sum = self.sum + other.sum
+        self.count = count
+
+        self.histogram.merge(other.histogram)
+
+        if self.distinct is None or other.distinct is None:
+            self.distinct = None
+        else:
+            values = np.concatenate([self.distinct[0], other.distinct[0]])
+            counts = np.concatenate([self.distinct[1], other.distinct[1]])
+            values, inverse = np.unique(values, return_inverse=True)
+            self.distinct = (values, np.bincount(inverse, weights=counts)
+                             .astype(np.int64))
+            if len(values) > self.width:
+                self.distinct = None
+
+    def _levels(self, smin, smax):
+        """Histogram levels, as `sparkline(hist=True)` would draw them."""
+        if self.distinct is None:
+            return self.histogram.levels(smin, smax, self.width)
+
+        values, counts = self.distinct
+        width = min(self.width, len(values))
+        edges = np.linspace(smin, smax, width, endpoint=False)
+        bins = np.searchsorted(edges, values.astype(float), side="right") - 1
+        return np.bincount(bins, weights=counts,
+                           minlength=width).astype(np.int64)
+
+    def profile(self, stats=()):
+        """Return the profile `summary` would have made of the whole column,
+        with `stats` given by the names pandas dispatches them by."""
+        from pandas import Timestamp, Timedelta
+        from eda.report import sparkline
+        from eda.report.report import _hist_graph
+
+        rows = self.count + self.missing
+        profile = {"count": self.count, "missing": self.missing}
+        datetime = self.dtype is not None and self.dtype.kind == "M"
+
+        tz = getattr(self.dtype, "tz", None)
+
+        def stamp(value):
+            return Timestamp(int(value), unit="ns", tz=tz)
+
+        if not self.native:
+            # Object columns hold Python objects, not NumPy scalars
+            lo, hi = ((value.item() if isinstance(value, np.generic)
+                       else value for value in (self.min, self.max))
+                      if self.extremes else ("", ""))
+            graph = " " * self.width if rows else ""
+        elif self.count == 0:
+            lo = hi = Timestamp("NaT") if datetime else np.float64(np.nan)
+            graph = ""
+        else:
+            lo = stamp(self.min) if datetime else self.min
+            hi = stamp(self.max) if datetime else self.max
+            graph = _hist_graph(self._levels(float(self.min),
+                                             float(self.max)), "▁▂▃▄▅▆▇█")
+
+        if self.dtype != "O":
+            profile["min"], profile["max"] = lo, hi
+        profile["graph"] = graph
+
+        var = np.float64(self.m2 / (self.count - 1)) if self.count > 1 \
+            else np.float64(np.nan)
+        values = {
+            "count": np.int64(self.count),
+            "min": "" if lo is None else lo,
+            "max": "" if hi is None else hi,
+        }
+        if self.native and not datetime:
+            values.update({
+                "sum": self.sum,
+                "mean": np.float64(self.mean) if self.count
+                else np.float64(np.nan),
+                "std": np.sqrt(var),
+                "var": var,
+            })
+        elif datetime and self.count:
+            values["mean"] = stamp(round(self.mean))
+            values["std"] = Timedelta(np.sqrt(var), unit="ns")
+
+        benford = sparkline([] if self.benford is None
+                            else self.benford.proportions(), width=9)
+
+        for approx, sketch in self.sketches.items():
+            values[approx] = "" if sketch is None \
+                else approx.result(sketch, self.dtype)
+
+        profile["stats"] = [benford if stat == "benford"
+                            else values.get(_approximation(stat) or stat, "")
+                            for stat in stats]
+        return profile
+
+
+def _common_dtype(a, b, a_empty=False, b_empty=False):
+    """The dtype pandas.read_csv would give a column made of a part it reads
+    as dtype `a` and one it reads as dtype `b`, where a part of missing
+    values alone defers to the other, or None if the parts disagree, in
+    which case read_csv reads the whole column as text."""
+    if a == b:
+        return a
+    elif a.kind in "iuf" and b.kind in "iuf":
+        return np.result_type(a, b)
+    elif "b" in (a.kind, b.kind) and \
+            (a_empty or b_empty or np.dtype(object) in (a, b)):
+        # read_csv holds Booleans alongside missing values as objects
+        return np.dtype(object)
+    elif b_empty:
+        return a
+    elif a_empty:
+        return b
+    else:
+        return None
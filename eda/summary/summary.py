@@ -28,37 +28,47 @@ SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
 import numpy as np
-from pandas import DataFrame
+from pandas import DataFrame, Series
 import matplotlib.pyplot as plt
 from eda.report import sparkline
+from eda._parallel import _n_workers
+from .sketch import _ColumnSketch, _present, _approximation, _read_chunks, \
+    BenfordCounter, _benford_expected
+from .rules import _misordered_mask, _column
 
 
-def _data_range(col):
-    if col.dtype == "O":
+def _data_range(dtype, profile):
+    if "min" not in profile:
         return ""
 
-    col_min = str(_safe_agg(col, "min"))
-    col_max = str(_safe_agg(col, "max"))
+    col_min = str(_format(dtype, profile["min"]))
+    col_max = str(_format(dtype, profile["max"]))
 
     return col_min + " – " + col_max if col_min and col_max else ""
 
 
-def _safe_agg(col, fun):
-    from pandas.api.types import is_numeric_dtype, is_datetime64_any_dtype
-
-    if fun == "benford":
+def _agg(col, fun):
+    if fun is False:
+        return ""
+    elif fun == "benford":
         return sparkline(benford(col), width=9)
+    elif _approximation(fun):
+        return _approximation(fun).column(col)
 
     try:
-        out = col.agg(fun)
+        return col.agg(fun)
     except (TypeError, ValueError):
-        out = ""
+        return ""
+
+
+def _format(dtype, out):
+    from pandas.api.types import is_numeric_dtype, is_datetime64_any_dtype
 
     # Some functions implicitly convert between datetime types ¯\_(ツ)_/¯
-    if is_datetime64_any_dtype(col) or is_datetime64_any_dtype(out):
+    if is_datetime64_any_dtype(dtype) or is_datetime64_any_dtype(out):
         try:
             return out.strftime("%b %_d, %Y")
-        except AttributeError:
+        except (AttributeError, ValueError):
             return out
     elif is_numeric_dtype(out):
         return "{:n}".format(out)
@@ -66,7 +76,155 @@ def _safe_agg(col, fun):
         return out
 
 
-def summary(self, **kwargs):
+def _safe_agg(col, fun):
+    return _format(col.dtype, _agg(col, fun))
+
+
+# Aggregations that the profiling pass computes directly from the column's
+# non-missing values, under the names pandas dispatches them by
+_FUSED = {
+    "count": lambda x: np.int64(x.size),
+    "sum": np.sum,
+    "mean": np.mean,
+    "median": np.median,
+    "min": lambda x: x.min() if x.size else np.float64(np.nan),
+    "max": lambda x: x.max() if x.size else np.float64(np.nan),
+    "std": lambda x: np.std(x, ddof=1),
+    "var": lambda x: np.var(x, ddof=1),
+}
+_FUSED_ALIASES = {np.sum: "sum", np.mean: "mean", np.median: "median",
+                  np.min: "min", np.max: "max", np.amin: "min",
+                  np.amax: "max"}
+
+
+def _fused_name(fun):
+    try:
+        fun = _FUSED_ALIASES.get(fun, fun)
+    except TypeError:
+        return None
+    return fun if isinstance(fun, str) and fun in _FUSED else None
+
+
+def _is_native(col):
+    """Whether a column holds plain numbers or datetimes, which are profiled
+    with NumPy rather than pandas."""
+    from pandas.api.types import is_datetime64_any_dtype
+
+    return is_datetime64_any_dtype(col) or col.dtype.kind in "iuf"
+
+
+def _profiles(columns, stats=(), n_jobs=None, cache=None):
+    """Profile each of `columns`, returning the profiles in the same order.
+    Profiles found in `cache` (a SummaryCache) are reused, and the rest are
+    stored there. With more than one worker, columns of plain numbers and
+    datetimes are profiled on threads, since NumPy releases the GIL for the
+    bulk of the work, and other columns, which pandas works through in
+    Python, on processes (unless `stats` cannot be pickled, in which case
+    everything runs on threads)."""
+    import pickle
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+    if cache is not None:
+        keys = [cache.key(col, stats) for col in columns]
+        profiles = [None if key is None else cache.get(key) for key in keys]
+        todo = [i for i, profile in enumerate(profiles) if profile is None]
+
+        fresh = _profiles([columns[i] for i in todo], stats, n_jobs)
+        for i, profile in zip(todo, fresh):
+            profiles[i] = profile
+            if keys[i] is not None:
+                cache.put(keys[i], profile)
+
+        return profiles
+
+    n_workers = _n_workers(n_jobs)
+    if n_workers == 1 or len(columns) < 2:
+        return [_profile(col, stats) for col in columns]
+
+    try:
+        pickle.dumps(stats)
+        remote = [not _is_native(col) for col in columns]
+    except (pickle.PicklingError, AttributeError, TypeError):
+        remote = [False] * len(columns)
+
+    processes = None
+    if any(remote):
+        processes = ProcessPoolExecutor(max_workers=min(n_workers,
+                                                        sum(remote)))
+    try:
+        with ThreadPoolExecutor(max_workers=n_workers) as threads:
+            futures = [(processes if far else threads).submit(_profile, col,
+                                                              stats)
+                       for col, far in zip(columns, remote)]
+            return [future.result() for future in futures]
+    finally:
+        if processes is not None:
+            processes.shutdown()
+
+
+def _profile(col, stats=(), width=10):
+    """Profile a column in a single vectorized pass over its values: the
+    number of present and missing values, the range, the levels of a
+    `width`-bin histogram, and any aggregations in `stats`, which are
+    returned in a list in the same order. Columns whose values are not plain
+    numbers or datetimes fall back on pandas for everything but the missing
+    count."""
+    import warnings
+    from pandas.api.types import is_datetime64_any_dtype
+    from eda.report.report import _hist_levels, _hist_graph
+
+    mask = col.isna().to_numpy()
+    missing = int(mask.sum())
+    profile = {"count": len(col) - missing, "missing": missing}
+
+    if not _is_native(col):
+        if col.dtype != "O":
+            profile["min"] = _agg(col, "min")
+            profile["max"] = _agg(col, "max")
+        profile["hist"] = None
+        profile["graph"] = sparkline(col, hist=True)
+        profile["stats"] = [_agg(col, stat) for stat in stats]
+        return profile
+    elif is_datetime64_any_dtype(col):
+        # Work on integer nanoseconds, returning the extrema as elements of
+        # the column so that they keep its time zone
+        stamps = col.to_numpy(dtype="datetime64[ns]")
+        values = stamps.view("int64")[~mask]
+        positions = np.flatnonzero(~mask)
+        if values.size:
+            profile["min"] = col.iloc[positions[values.argmin()]]
+            profile["max"] = col.iloc[positions[values.argmax()]]
+        else:
+            profile["min"] = profile["max"] = col.dtype.type("NaT")
+        fused = {"count"}
+    else:
+        values = _present(col, mask)
+        profile["min"] = _FUSED["min"](values)
+        profile["max"] = _FUSED["max"](values)
+        fused = set(_FUSED)
+
+    if values.size:
+        smin, smax = float(values.min()), float(values.max())
+        profile["hist"] = _hist_levels(values.astype(float), smin, smax,
+                                       width)
+    else:
+        profile["hist"] = np.zeros(0, dtype=int)
+    profile["graph"] = _hist_graph(profile["hist"], "▁▂▃▄▅▆▇█")
+
+    with warnings.catch_warnings(), np.errstate(all="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        profile["stats"] = [_FUSED[_fused_name(stat)](values)
+                            if _fused_name(stat) in fused
+                            else _approximation(stat).estimate(values,
+                                                               col.dtype)
+                            if _approximation(stat)
+                            else _agg(col, stat)
+                            for stat in stats]
+
+    return profile
+
+
+def summary(self, n_jobs=None, cache=None, **kwargs):
     """Generate a summary of a given data frame, including missing data and
     histograms of numeric columns.
 
@@ -77,31 +235,119 @@ def summary(self, **kwargs):
         df.summary(Mean=np.mean, Median="median")
 
     will create mean and median columns. You can also pass the custom
-    function "benford" to check conformity to Benford's Law."""
-    missing = self.isna().sum()
+    function "benford" to check conformity to Benford's Law.
+
+    Exact medians and distinct counts need a sort or a hash table of each
+    column, so there are also approximate versions, computed from bounded
+    sketches that can be merged across chunks:
+
+        "approx_median":     The median, from a KLL sketch. Its rank is
+                             typically within 1% of the number of values,
+                             and it is exact for 200 values or fewer.
+        approx_quantile(q):  The same, for the `q`th quantile.
+        "approx_nunique":    The number of distinct values, from a
+                             HyperLogLog counter, with a relative standard
+                             error of about 1.6%.
+
+    Columns are profiled one at a time unless `n_jobs` is given, in which
+    case numeric and datetime columns are profiled on that many threads and
+    other columns on that many processes (-1 means one per CPU). The output
+    is the same either way.
+
+    Pass a SummaryCache as `cache` to reuse the profiles of columns that
+    have not changed since they were last summarized."""
+    stats = list(kwargs.values())
+    columns = [self.iloc[:, i] for i in range(self.shape[1])]
 
-    missing_zip = zip(missing, missing / self.shape[0])
+    return _summary_table(self.dtypes, self.shape[0],
+                          _profiles(columns, stats, n_jobs, cache), kwargs)
+
+
+def _summary_table(dtypes, n_rows, profiles, titles):
+    missing = Series([profile["missing"] for profile in profiles],
+                     index=dtypes.index)
+    missing_zip = zip(missing, missing / n_rows)
 
     df = DataFrame({
-        "Type": self.dtypes,
+        "Type": dtypes,
         "Missing values": ["{:,} ({:.0%})".format(no, pct)
                            for no, pct in missing_zip],
-        "Range": [_data_range(self[col]) for col in self],
-        "Distribution": [self.sparkline(col, hist=True) for col in self],
-        **{title: [_safe_agg(self[col], stat) for col in self]
-           for title, stat in kwargs.items()}
-    }, index=self.columns)
+        "Range": [_data_range(dtype, profile)
+                  for dtype, profile in zip(dtypes, profiles)],
+        "Distribution": [profile["graph"] for profile in profiles],
+        **{title: [_format(dtype, profile["stats"][i])
+                   for dtype, profile in zip(dtypes, profiles)]
+           for i, title in enumerate(titles)}
+    }, index=dtypes.index)
 
     df.index.name = "Column"
+
+    # The total is kept for data_dictionary's caption, which would otherwise
+    # count them again. It is a plain number, since pandas compares attrs
+    # when combining frames.
+    df.attrs["missing"] = int(missing.sum())
     return df
 
 
+def summarize_path(path, chunksize=100_000, read_kwargs=None, **kwargs):
+    """Generate the same summary as `summary` for a CSV or Parquet file that
+    is too large to load into memory, reading `chunksize` rows at a time.
+    Any `read_kwargs` are passed on to pandas.read_csv or to
+    pyarrow.parquet.ParquetFile.iter_batches.
+
+    Each chunk is folded into a mergeable summary of each column, so only
+    aggregations that can be computed that way can be added: "count",
+    "sum", "mean", "min", "max", "std", "var" (or the NumPy equivalents),
+    "benford", and the approximate aggregations (see `summary`). The
+    distribution of a column with more distinct values than bars is drawn
+    from a finer histogram, so a bar can occasionally come out a level off
+    from what `summary` draws. A column whose chunks are read as different
+    types, such as numbers in some and words in others, is read a second
+    time as text, as pandas.read_csv would read it whole."""
+    streamable = {"count", "sum", "mean", "min", "max", "std", "var"}
+    stats = []
+    for title, stat in kwargs.items():
+        name = "benford" if stat == "benford" else \
+            _approximation(stat) or _fused_name(stat)
+        if name not in streamable | {"benford"} and \
+                not _approximation(name):
+            raise ValueError(f"Cannot compute {title} from chunks. Allowed "
+                             "functions: " + ", ".join(sorted(streamable)) +
+                             ", benford, approx_median, approx_nunique, "
+                             "approx_quantile")
+        stats.append(name)
+
+    sketches = {}
+    for chunk in _read_chunks(path, chunksize, read_kwargs):
+        for col in chunk:
+            if col not in sketches:
+                sketches[col] = _ColumnSketch(stats=stats)
+            sketches[col].update(chunk[col])
+
+    # pandas.read_csv reads a column as text if its parts would be read as
+    # different types, e.g., numbers and words, so read such columns again
+    # that way
+    mixed = [col for col, sketch in sketches.items() if sketch.mixed]
+    if mixed:
+        for col in mixed:
+            sketches[col] = _ColumnSketch(stats=stats)
+        for chunk in _read_chunks(path, chunksize, read_kwargs, text=mixed):
+            for col in mixed:
+                sketches[col].update(chunk[col])
+
+    dtypes = Series({col: sketch.dtype for col, sketch in sketches.items()},
+                    dtype=object)
+    profiles = [sketch.profile(stats) for sketch in sketches.values()]
+    n_rows = profiles[0]["count"] + profiles[0]["missing"] if profiles else 0
+
+    return _summary_table(dtypes, n_rows, profiles, kwargs)
+
+
 def missing(self, *args, **kwargs):
     """Display bar graph of missing data by column."""
-    return self.\
-        isna().\
-        mean().\
-        apply(lambda x: x * 100).\
+    counts = _bucket_missing(_packed_missing(self), self.shape[1],
+                             np.array([0, self.shape[0]]))[0]
+    return Series(counts / self.shape[0] * 100, index=self.columns).\
         iloc[::-1].\
         plot.\
         barh(
@@ -115,13 +361,23 @@ def missing(self, *args, **kwargs):
 
 def missing_by(self, col, *args, **kwargs):
     """Display bar graph of missing data by column, grouped by column `col`."""
-    return self.\
-        drop(col, axis=1).\
-        isna().\
-        join(self[col]).\
-        groupby(col).\
-        mean().\
-        apply(lambda x: x * 100).\
+    import pandas as pd
+
+    rest = self.drop(col, axis=1)
+    codes, groups = pd.factorize(self[col], sort=True)
+
+    # Sort the rows by group, so that each group is a bucket of consecutive
+    # rows, leaving out those with no group
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]
+    sizes = np.bincount(codes[order], minlength=len(groups))
+    edges = np.append(0, np.cumsum(sizes))
+
+    counts = _bucket_missing(_packed_missing(rest)[order], rest.shape[1],
+                             edges)
+    return DataFrame(counts / sizes[:, np.newaxis] * 100,
+                     index=pd.Index(groups, name=col),
+                     columns=rest.columns).\
         iloc[:, ::-1].\
         transpose().\
         plot.\
@@ -133,18 +389,106 @@ def missing_by(self, col, *args, **kwargs):
            )
 
 
-def missing_map(self, figsize=(8, 5), color="red", *args, **kwargs):
+def missing_patterns(self, top=10):
+    """Find which columns go missing together. Returns a data frame with a
+    row for each of the `top` most common patterns of missing values (or
+    all of them, if `top` is None), marking the columns missing in that
+    pattern True, with the number and fraction of rows that follow it.
+
+    Each row's pattern is packed into a bitset, a bit per column, so this
+    takes an eighth of the memory of `isna()`."""
+    packed = _packed_missing(self)
+
+    # View each row's bitset as a single value, so that patterns can be
+    # counted by sorting
+    if packed.shape[1] <= 8:
+        keys = np.zeros((packed.shape[0], 8), dtype=np.uint8)
+        keys[:, :packed.shape[1]] = packed
+        keys = keys.view(np.uint64).ravel()
+    else:
+        keys = np.ascontiguousarray(packed).view(
+            np.dtype((np.void, packed.shape[1]))).ravel()
+
+    _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+
+    # Most common first, breaking ties by which appears first
+    order = np.lexsort((first, -counts))[:top]
+    patterns = np.unpackbits(packed[first[order]], axis=1,
+                             count=self.shape[1]).astype(bool)
+
+    df = DataFrame(patterns, columns=self.columns)
+    df["Rows"] = counts[order]
+    df["Fraction"] = counts[order] / self.shape[0]
+    return df
+
+
+# Rows to unpack from a packed missingness mask at a time
+_BLOCK = 2**16
+
+
+def _packed_missing(self):
+    """Return the missingness of each row of a data frame as a bitset, one
+    bit per column, packed with np.packbits. The mask is built a block of
+    rows at a time, so at most that block is ever held at a byte a cell."""
+    packed = np.empty((self.shape[0], (self.shape[1] + 7) // 8),
+                      dtype=np.uint8)
+    for lo in range(0, self.shape[0], _BLOCK):
+        block = self.iloc[lo:lo + _BLOCK].isna().to_numpy()
+        packed[lo:lo + _BLOCK] = np.packbits(block, axis=1)
+    return packed
+
+
+def _bucket_missing(packed, n_cols, edges):
+    """Count the missing values in each column among the rows of each bucket
+    running from one of `edges` to the next, which must be increasing."""
+    counts = np.zeros((len(edges) - 1, n_cols), dtype=np.int64)
+
+    for lo in range(0, edges[-1], _BLOCK):
+        hi = min(lo + _BLOCK, edges[-1])
+        bits = np.unpackbits(packed[lo:hi], axis=1, count=n_cols)
+
+        # Sum the block's rows by bucket, starting the first bucket at the
+        # top of the block if it started above it
+        first = np.searchsorted(edges, lo, side="right") - 1
+        last = np.searchsorted(edges, hi - 1, side="right") - 1
+        starts = np.maximum(edges[first:last + 1], lo) - lo
+        counts[first:last + 1] += np.add.reduceat(bits, starts, axis=0,
+                                                  dtype=np.int64)
+
+    return counts
+
+
+def missing_map(self, figsize=(8, 5), color="red", bins="auto", *args,
+                **kwargs):
     """Display heatmap of missing data to uncover patterns. Note that the
-    columns of the dataframe are shown on the y-axis."""
+    columns of the dataframe are shown on the y-axis.
+
+    Rows are grouped into `bins` buckets of consecutive rows, each shaded by
+    the fraction of its values that are missing. By default ("auto"), there
+    are as many buckets as the figure is pixels wide, or one per row if
+    there are fewer rows than that, so the time it takes to draw does not
+    grow with the number of rows. Pass None for one bucket per row."""
     from matplotlib.colors import LinearSegmentedColormap
+    from matplotlib.ticker import MaxNLocator
     cmap = LinearSegmentedColormap.from_list("cmap", ["#00000000", color])
 
     fig, ax = plt.subplots(figsize=figsize)
-    ax.pcolormesh(self.T.isna(), cmap=cmap)
+
+    n_rows, n_cols = self.shape
+    if bins == "auto":
+        bins = int(fig.get_figwidth() * fig.dpi)
+    bins = n_rows if bins is None else max(1, min(bins, n_rows))
+
+    edges = np.linspace(0, n_rows, bins + 1).round().astype(int)
+    counts = _bucket_missing(_packed_missing(self), n_cols, edges)
+
+    ax.pcolormesh(edges, np.arange(n_cols + 1),
+                  (counts / np.diff(edges)[:, np.newaxis]).T,
+                  cmap=cmap, vmin=0, vmax=1)
     ax.set_title("Missing data")
     ax.set_ylabel("Column")
     ax.set_xlabel("Row position")
-    ax.set_xticks(range(self.shape[0]))
+    ax.xaxis.set_major_locator(MaxNLocator(integer=True))
     ax.set_yticks(range(len(self.columns)))
     ax.set_yticklabels(self.columns)
 
@@ -167,46 +511,49 @@ def misordered(self, *cols, ascending=True, allow_equal=True):
        Boolean arguments are also accepted:
 
        `ascending`: Specifiy whether the *proper* order of columns is ascending
-       `allow_equal`: Allow values in adjacent columns to be equal"""
-    import operator
-
-    if ascending:
-        op = operator.gt if allow_equal else operator.ge
-    else:
-        op = operator.lt if allow_equal else operator.le
+       `allow_equal`: Allow values in adjacent columns to be equal
 
-    mask = [op(self[a], self[b]) for a, b in zip(cols, cols[1:])]
-    indices = self[np.logical_or.reduce(mask)].index
-    return self.loc[indices, cols]
+       To check many such rules at once, see `RuleSet`."""
+    mask = _misordered_mask([_column(self, col) for col in cols],
+                            ascending, allow_equal)
+    return self.iloc[np.flatnonzero(mask)].loc[:, list(cols)]
 
 
-def _get_first_digit(x):
-    if x == 0:
-        return 0
-    else:
-        return int(str(x).lstrip('0.-')[0])
+def benford(iterable, test="first"):
+    """Give the proportion of the numbers in `iterable` with each leading
+    digit, to check conformity to Benford's Law. Zeros and missing values
+    are left out, and an empty list is returned for non-numeric input. The
+    `test` may be:
 
+        "first": the first digit (1 through 9)
+        "first_two": the first two digits (10 through 99)
+        "second": the second digit (0 through 9)
 
-def benford(iterable):
+    To count the digits of a dataset in parts, see `BenfordCounter`."""
     try:
-        iterable = list(map(int, iterable))
+        if not hasattr(iterable, "__len__"):
+            iterable = list(iterable)
+        values = np.asarray(iterable)
+        if values.dtype.kind in "mM":
+            return []
+        values = values.astype(float)
     except (TypeError, ValueError):
         return []
 
-    digits = np.arange(1, 10)
-    return [(np.array(list(map(_get_first_digit, iterable))) == n).mean()
-            for n in digits]
+    return BenfordCounter().update(values).proportions(test)
 
 
-def benford_plot(iterable, ax=None, *args, **kwargs):
-    digits = np.arange(1, 10)
-
-    predicted = [np.log10(1 + 1/n) for n in digits]
-    actual = benford(iterable)
+def benford_plot(iterable, ax=None, *args, test="first", **kwargs):
+    actual = benford(iterable, test=test)
+    digits = BenfordCounter.tests[test]
+    predicted = _benford_expected(test)
 
     if not ax:
         ax = plt.gca()
 
+    if not actual:
+        actual = np.zeros(len(digits))
+
     ax.bar(digits - 1/6, predicted,
            width=1/3,
            align="center",
@@ -231,4 +578,5 @@ DataFrame.summary = summary
 DataFrame.missing = missing
 DataFrame.missing_by = missing_by
 DataFrame.missing_map = missing_map
+DataFrame.missing_patterns = missing_patterns
 DataFrame.misordered = misordered
@@ -13,6 +13,7 @@ setup(
         "matplotlib",
         "numpy",
         "pandas",
+        "scipy",
         "sklearn",
     ]
 )
@@ -0,0 +1,17 @@
+import numpy as np
+
+from eda.accuracy import cohens_kappa, KappaAccumulator
+
+
+def test_kappa_accumulator_matches_cohens_kappa():
+    rng = np.random.RandomState(0)
+    a, b = rng.randint(0, 3, 500), rng.randint(0, 3, 500)
+    accumulator = KappaAccumulator()
+    for start in range(0, 500, 64):
+        accumulator.update(a[start:start+64], b[start:start+64])
+    assert np.isclose(accumulator.result(), cohens_kappa(a, b))
+
+
+def test_kappa_accumulator_empty():
+    assert np.isnan(KappaAccumulator().result())
+    assert np.isnan(KappaAccumulator().merge(KappaAccumulator()).result())
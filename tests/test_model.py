@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from eda.model import DBSCAN
+
+
+def same_partition(a, b):
+    """Whether two labelings are equal up to renumbering of clusters, with
+    noise mapped to noise"""
+    if not np.array_equal(a == -1, b == -1):
+        return False
+    pairs = np.unique(np.column_stack([a, b]), axis=0)
+    return (np.unique(pairs[:, 0]).shape[0] == pairs.shape[0] and
+            np.unique(pairs[:, 1]).shape[0] == pairs.shape[0])
+
+
+def random_points():
+    return np.random.RandomState(0).uniform(0, [20, 10], size=(1000, 2))
+
+
+def duplicate_points():
+    # Few distinct points, many copies of each, and many ties in distance
+    rng = np.random.RandomState(1)
+    return rng.randint(0, 12, size=(3000, 2)).astype(float)
+
+
+def boundary_points():
+    # Runs of three points 0.25 apart, each exactly eps from the next run.
+    # Neighbors must be strictly closer than eps, so each run is its own
+    # cluster, but only if points exactly eps apart, including across
+    # whatever slab boundaries are chosen, are treated as the serial
+    # algorithm treats them.
+    steps = np.tile([0.25, 0.25, 0.5], 100)
+    x = np.concatenate([[0], np.cumsum(steps)])
+    return np.concatenate([np.column_stack([x, np.zeros_like(x)]),
+                           np.column_stack([x, np.full_like(x, 0.5)])])
+
+
+@pytest.mark.parametrize("make", [random_points, duplicate_points,
+                                  boundary_points])
+@pytest.mark.parametrize("n_jobs", [2, 3, 4, 8])
+def test_parallel_matches_serial(make, n_jobs):
+    X = make()
+    serial = DBSCAN(eps=0.5, min_samples=3).fit(X)
+    parallel = DBSCAN(eps=0.5, min_samples=3, n_jobs=n_jobs).fit(X)
+
+    assert parallel.n_clusters_ == serial.n_clusters_
+    assert same_partition(parallel.labels_, serial.labels_)
+    assert np.array_equal(parallel.core_sample_indices_,
+                          serial.core_sample_indices_)
+
+
+@pytest.mark.parametrize("silhouette", ["off", None, False])
+def test_silhouette_off(silhouette):
+    dbscan = DBSCAN(silhouette=silhouette).fit(random_points())
+    assert np.isnan(dbscan.silhouette_)
+
+
+@pytest.mark.parametrize("silhouette", ["exact", True, 500])
+def test_silhouette_computed(silhouette):
+    dbscan = DBSCAN(min_samples=3, silhouette=silhouette) \
+        .fit(random_points())
+    assert -1 <= dbscan.silhouette_ <= 1
+
+
+@pytest.mark.parametrize("silhouette", ["sample", 0, -5, 0.5])
+def test_silhouette_invalid(silhouette):
+    with pytest.raises(ValueError, match="silhouette must be"):
+        DBSCAN(silhouette=silhouette).fit(random_points())
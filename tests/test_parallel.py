@@ -0,0 +1,18 @@
+import os
+
+import pytest
+
+from eda._parallel import _n_workers
+
+
+@pytest.mark.parametrize("n_jobs, expected", [
+    (None, 1), (1, 1), (3, 3), (-1, 8), (-2, 7), (-20, 1),
+])
+def test_n_workers(monkeypatch, n_jobs, expected):
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    assert _n_workers(n_jobs) == expected
+
+
+def test_n_workers_zero():
+    with pytest.raises(ValueError, match="n_jobs"):
+        _n_workers(0)
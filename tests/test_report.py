@@ -0,0 +1,15 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from eda.report.report import _write_table
+
+
+@pytest.mark.parametrize("format", ["markdown", "html", "csv"])
+def test_write_table_missing_cells(format):
+    df = pd.DataFrame({"name": ["x", np.nan], "mean": [1.5, np.nan]})
+    out = io.StringIO()
+    _write_table(df, out, format)
+    assert "nan" in out.getvalue()
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+import eda  # noqa: F401 (adds DataFrame.misordered)
+from eda.summary import RuleSet
+
+
+def test_misordered_object_with_none():
+    df = pd.DataFrame({"a": ["apple", "cherry", None, "banana"],
+                       "b": ["banana", "banana", "apple", None]},
+                      dtype=object)
+    assert df.misordered("a", "b").index.tolist() == [1]
+
+
+def test_order_rule_object_with_none():
+    df = pd.DataFrame({"a": ["apple", "cherry", None, "banana"],
+                       "b": ["banana", "banana", "apple", None]},
+                      dtype=object)
+    result = RuleSet().order("a", "b").check(df)
+    assert result["Rows"].iloc[0].tolist() == [1]
+
+
+def test_datetime_range():
+    df = pd.DataFrame({"d": pd.to_datetime(["2019-06-01", "2021-01-01", None,
+                                            "2020-06-01"])})
+    result = RuleSet() \
+        .range("d", "2020-01-01") \
+        .range("d", pd.Timestamp("2020-01-01"), pd.Timestamp("2020-12-31")) \
+        .check(df)
+    assert [rows.tolist() for rows in result["Rows"]] == [[0], [0, 1]]
+
+
+def test_numeric_range_skips_missing():
+    df = pd.DataFrame({"n": [1, np.nan, 5, 2]})
+    result = RuleSet().range("n", 0, 4).check(df)
+    assert result["Rows"].iloc[0].tolist() == [2]
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from eda.summary.sketch import _KLL
+
+
+def rank_error(sketch, values, q):
+    values = np.sort(values)
+    estimate = sketch.quantile(q)
+    lo = np.searchsorted(values, estimate, side="left")
+    hi = np.searchsorted(values, estimate, side="right")
+    rank = np.clip(q * values.size, lo, hi)
+    return abs(rank - q * values.size) / values.size
+
+
+@pytest.mark.parametrize("batch", [None, 1000, 37])
+def test_kll_rank_error(batch):
+    values = np.random.RandomState(0).standard_normal(200_000)
+    sketch = _KLL(seed=1)
+    if batch is None:
+        sketch.update(values)
+    else:
+        for start in range(0, values.size, batch):
+            sketch.update(values[start:start+batch])
+
+    assert sketch.count == values.size
+    for q in [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]:
+        assert rank_error(sketch, values, q) < 0.01
+
+
+def test_kll_merge_rank_error():
+    values = np.random.RandomState(0).exponential(size=200_000)
+    sketch = _KLL(seed=1)
+    for part in np.array_split(values, 16):
+        sketch.merge(_KLL(seed=2).update(part))
+
+    for q in [0.01, 0.5, 0.99]:
+        assert rank_error(sketch, values, q) < 0.01
+
+
+def test_kll_exact_when_small():
+    values = np.random.RandomState(0).uniform(size=150)
+    sketch = _KLL().update(values)
+    assert sketch.quantile(0.5) == np.quantile(values, 0.5)
+
+
+@pytest.mark.parametrize("n", [10_000, 1_000_000])
+def test_kll_memory(n):
+    values = np.random.RandomState(0).uniform(size=n)
+    whole = _KLL().update(values)
+    streamed = _KLL()
+    for start in range(0, n, 4096):
+        streamed.update(values[start:start+4096])
+
+    for sketch in [whole, streamed]:
+        size = sum(len(items) for items in sketch.levels)
+        assert size <= 3 * sketch.k + 2 * len(sketch.levels)
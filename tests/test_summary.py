@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+import eda  # noqa: F401 (adds DataFrame.summary)
+from eda.summary import summarize_path
+
+
+@pytest.fixture
+def mixed_csv(tmp_path):
+    # Columns whose chunks pandas reads as different types
+    pd.DataFrame({
+        "int_then_float": list(range(50)) + [x + 0.5 for x in range(50)],
+        "int_then_str": list(range(50)) + ["word"] * 50,
+        "bool_then_int": [True, False] * 25 + list(range(50)),
+        "missing_then_int": [None] * 50 + list(range(50)),
+        "date_then_str": ["2020-01-01"] * 50 + ["x"] * 50,
+        "bool_then_missing": [True, False] * 25 + [None] * 50,
+        "bool": [True, False] * 50,
+        "float_with_nan": [1.5, None] * 50,
+    }).to_csv(tmp_path / "mixed.csv", index=False)
+    return tmp_path / "mixed.csv"
+
+
+@pytest.mark.parametrize("chunksize", [7, 25, 1000])
+def test_summarize_path_matches_summary(mixed_csv, chunksize):
+    stats = {"N": "count", "Min": "min", "Max": "max",
+             "Distinct": "approx_nunique", "Benford": "benford"}
+    expected = pd.read_csv(mixed_csv).summary(**stats)
+    result = summarize_path(mixed_csv, chunksize=chunksize, **stats)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_summary_combines_like_a_frame():
+    a = pd.DataFrame({"x": [1, None, 3], "y": ["red", "blue", None]})
+    b = pd.DataFrame({"x": [1.5, 2.5], "y": [None, None]})
+
+    combined = pd.concat([a.summary(), b.summary()])
+    assert combined.shape[0] == 4
+    assert combined.astype(str).shape == combined.shape
+    assert a.summary().astype(str).loc["y", "Missing values"] == "1 (33%)"
+
+
+def test_data_dictionary_caption():
+    df = pd.DataFrame({"x": [1, None, 3], "y": ["red", None, None]})
+    assert "3 rows with 3 missing values" in df.data_dictionary()
+
+
+def test_summarize_path_mixed_with_read_kwargs(tmp_path):
+    # Arguments naming other columns must not break the second read of the
+    # mixed column
+    path = tmp_path / "dated.csv"
+    pd.DataFrame({
+        "id": range(60),
+        "when": [f"2020-01-0{i % 9 + 1}" for i in range(60)],
+        "mixed": list(range(30)) + ["word"] * 30,
+        "scaled": range(60),
+        "code": range(60),
+    }).to_csv(path, index=False)
+    read_kwargs = {"parse_dates": ["when"], "index_col": "id",
+                   "converters": {"scaled": lambda x: int(x) * 2},
+                   "dtype": {"code": "float64"}}
+
+    expected = pd.read_csv(path, **read_kwargs).summary()
+    result = summarize_path(path, chunksize=10, read_kwargs=read_kwargs)
+    pd.testing.assert_frame_equal(result, expected)